@@ -1,13 +1,27 @@
+import os
+import sys
+
+# Code this app has in common with the other apps is in shared/ at the repository root, which Streamlit doesn't put on sys.path
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
 import streamlit as st
 import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score, confusion_matrix, classification_report, ConfusionMatrixDisplay
-from sklearn.tree import DecisionTreeClassifier
-from sklearn.linear_model import LogisticRegression
-from sklearn.utils.multiclass import type_of_target
-from sklearn.preprocessing import LabelEncoder
+
+from shared.profiling import render_panel, session_profiler
+
+# Every stage of this rerun is timed (wall time, CPU time, peak memory) for the profiling panel at the bottom of the sidebar
+profiler = session_profiler("supervised")
+
+# scikit-learn, seaborn and matplotlib are imported by the functions and branches that use them, not here: the app can show the data and its first plots before the model libraries are loaded
+with profiler.stage("imports"):
+    from ingest import read_csv_chunked
+    from plots import correlation_heatmap_figure, histogram_kde_figure, series_fingerprint
+    from shared.figures import FigureCache
+    from shared.jobs import JobExecutor, background_job
+    from shared.sample_data import load_iris_frame
+    from training import ResultCache, result_key, train_and_evaluate
 
 # Header and a brief description of what the user should do (upload data, choose features, etc.)
 st.title("Interactive Supervised Machine Learning App 🧠")
@@ -23,21 +37,29 @@ sample_data = st.sidebar.radio("Select Data Source", ["Use Sample Dataset", "Upl
 # Here, the @st.cache_data decorator efficiently caches the Iris dataset to improve app performance by loading it only once. The load_sample_data() function imports the classic Iris flower dataset from scikit-learn, converts it to a pandas DataFrame format, and returns it for use in the Streamlit app
 @st.cache_data
 def load_sample_data():
-    from sklearn.datasets import load_iris
-    data = load_iris(as_frame=True)
-    return data.frame
+    return load_iris_frame()
+
+# Uploads are read through the chunked ingestion pipeline: column types are inferred from a sample, numeric columns are downcast and text columns are label-encoded chunk by chunk, so multi-GB files never sit in memory as raw strings. The result is cached per uploaded file so widget changes don't re-read it, and the sidebar reports rows/sec and peak memory of the ingestion
+@st.cache_resource(max_entries=2)
+def ingest_upload(file_id, _uploaded_file):
+    _uploaded_file.seek(0)
+    return read_csv_chunked(_uploaded_file)
 
 df = None
 
 # This code handles data loading based on user choice: if the user selects "Use Sample Dataset," it loads the cached Iris dataset; otherwise, it prompts the user to upload a CSV file, loads it if provided, and displays appropriate success/error messages. If no data source is available, it warns the user and stops execution
 if sample_data == "Use Sample Dataset":
-    df = load_sample_data()
+    with profiler.stage("load sample"):
+        df = load_sample_data()
 elif sample_data is not None:
     uploaded_file = st.sidebar.file_uploader("Upload your CSV", type=["csv"])
     if uploaded_file is not None:
         try:
-            df = pd.read_csv(uploaded_file)
+            with profiler.stage("ingest upload"):
+                ingested = ingest_upload(uploaded_file.file_id, uploaded_file)
+            df = ingested.frame
             st.sidebar.success("File uploaded successfull")
+            st.sidebar.caption(ingested.stats.summary())
         except Exception as e:
             st.sidebar.error(f"Error reading file")
             st.stop()
@@ -52,11 +74,13 @@ if df is None:
     st.warning("Please upload a CSV file or use the sample dataset")
     st.stop()
 
-# Encoding categorical features and handling missing values
-df.dropna(inplace=True)
+# Encoding categorical features and handling missing values (uploads already come back encoded and without missing values from the ingestion pipeline). Sorted factorize codes are exactly what LabelEncoder produces, without importing scikit-learn for it
+if sample_data == "Use Sample Dataset":
+    with profiler.stage("encode"):
+        df.dropna(inplace=True)
 
-for col in df.select_dtypes(include="object").columns:
-    df[col] = LabelEncoder().fit_transform(df[col].astype(str))
+        for col in df.select_dtypes(include="object").columns:
+            df[col] = pd.factorize(df[col].astype(str), sort=True)[0]
 
 # User is able preview the dataset
 st.subheader("Dataset Preview 🔍")
@@ -82,34 +106,63 @@ elif model_option == "Logistic Regression":
     max_iter = st.sidebar.slider("Select max_iter - how many times the model can update during training", 2, 1000, 100)
 
 
+# One result cache per server process, shared by every session (memory LRU in front of an LRU-trimmed disk cache)
+@st.cache_resource
+def get_result_cache():
+    return ResultCache()
+
+# Training runs on a thread pool shared by every session instead of on this script's thread: clicking Train submits a job, and the page shows its progress (with a Cancel button) and stays responsive until the results are in. Sessions training on the same data with the same settings share one job
+@st.cache_resource
+def get_job_executor():
+    return JobExecutor()
+
+
+# Based on the user's selection, the model is either a Decision Tree with customized maximum depth or a Logistic Regression with specified maximum iterations
+params = {"max_depth": max_depth} if model_option == "Decision Tree" else {"max_iter": max_iter}
+# The settings a result belongs to: it stays on the page across reruns until one of them changes
+data_token = "sample" if sample_data == "Use Sample Dataset" else uploaded_file.file_id
+config = (data_token, tuple(features), target, model_option, tuple(params.items()), test_size)
+
 # When the user clicks the "Train Model" button, this code splits the data into features and target, validates that the target is suitable for classification, divides data into training and testing sets, then trains either a Decision Tree or Logistic Regression model based on user selection. After training, it evaluates model performance using accuracy scores and classification reports, and visualizes results through a confusion matrix and, for Decision Trees, a feature importance chart
+submit = None
 if st.button("Train Model 🚀"):
     X = df[features]
     y = df[target]
 
     # This code validates that the target variable is appropriate for classification tasks by checking if it's binary or multiclass, showing an error message and stopping execution if the user has selected an incompatible target type like continuous data
     if model_option in ["Decision Tree", "Logistic Regression"]:
+        from sklearn.utils.multiclass import type_of_target
+
         target_type = type_of_target(y)
         if target_type not in ["binary", "multiclass"]:
             st.error("❗ For classification, choose a categorical target (e.g., species/class labels).")
             st.stop()
 
-    # This line splits the data into training and testing sets using the user-specified test size ratio, with a fixed random seed (42) to ensure results are reproducible across different runs
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=42)
+    # train_and_evaluate splits the data using the user-specified test size ratio with a fixed random seed (42), fits the model and scores it, so results are reproducible across different runs
+    # Results are cached under a fingerprint of the selected data plus the whole configuration, so re-training with settings that were already used (by anyone on this server) comes back instantly instead of refitting. The same fingerprint keys the background job
+    with profiler.stage("result key"):
+        key = result_key(df, features, target, model_option, params, test_size)
+    result_cache = get_result_cache()
 
-    # Based on the user's selection, this code creates either a Decision Tree model with customized maximum depth or a Logistic Regression model with specified maximum iterations, both using consistent randomization for reproducibility
-    if model_option == "Decision Tree":
-        model = DecisionTreeClassifier(max_depth=max_depth, random_state=42)
-    else:
-        model = LogisticRegression(max_iter=max_iter)
+    def training_job(job):
+        with job.step("train"):
+            return result_cache.get_or_compute(
+                key, lambda: train_and_evaluate(X, y, model_option, params, test_size, progress=job.report)
+            )
+
+    submit = (key, training_job, f"Training the {model_option}")
 
-    model.fit(X_train, y_train)
-    predictions = model.predict(X_test)
+job = background_job(get_job_executor(), "training", config, submit, profiler=profiler)
+if job is not None:
+    result, cache_hit = job.result
+    if cache_hit:
+        st.caption("Loaded a cached result for these settings ⚡")
 
     # I create three new variables to store different performance metrics: "acc" for accuracy score, "cm" for the confusion matrix array, and "cr" for the detailed classification report string containing precision, recall, and F1-scores
-    acc = accuracy_score(y_test, predictions)
-    cm = confusion_matrix(y_test, predictions)
-    cr = classification_report(y_test, predictions, zero_division=0)
+    model = result.model
+    acc = result.accuracy
+    cm = result.confusion_matrix
+    cr = result.classification_report
 
     # I display a "Model Performance" section with a checkmark emoji, showing the rounded accuracy score in bold text and the full classification report in a pre-formatted text block for easy reading
     st.subheader("Model Performance ✅")
@@ -117,11 +170,15 @@ if st.button("Train Model 🚀"):
     st.text("Classification Report:\n" + cr)
 
     # Here, I create and display a confusion matrix visualization. It first sets up a matplotlib figure and axis, then uses ConfusionMatrixDisplay to plot the confusion matrix (stored in variable "cm") with class labels from the model. The visualization uses a blue color scheme ("Blues"), removes the colorbar for cleaner appearance, adds a bold title, and displays the resulting figure in the Streamlit app using st.pyplot()
-    fig, ax = plt.subplots()
-    disp = ConfusionMatrixDisplay(confusion_matrix=cm, display_labels=model.classes_)
-    disp.plot(ax=ax, cmap="Blues", colorbar=False)
-    ax.set_title("Confusion Matrix", fontsize=14, fontweight='bold')
-    st.pyplot(fig)
+    with profiler.stage("confusion matrix plot"):
+        import matplotlib.pyplot as plt
+        from sklearn.metrics import ConfusionMatrixDisplay
+
+        fig, ax = plt.subplots()
+        disp = ConfusionMatrixDisplay(confusion_matrix=cm, display_labels=model.classes_)
+        disp.plot(ax=ax, cmap="Blues", colorbar=False)
+        ax.set_title("Confusion Matrix", fontsize=14, fontweight='bold')
+        st.pyplot(fig)
     
     # This conditionally displays feature importance for Decision Tree models. It extracts feature importance values from the model, creates a DataFrame pairing feature names with their importance scores, sorts them by importance in descending order, and generates a horizontal bar chart using seaborn
     if model_option == "Decision Tree":
@@ -134,23 +191,34 @@ if st.button("Train Model 🚀"):
         }).sort_values(by='Importance', ascending=False)
 
         # I create a horizontal bar chart using seaborn, displaying features sorted by their importance values, with a bold title and labeled axes, then render this visualization in the Streamlit app to help users understand which features most influence the model's decisions
-        fig, ax = plt.subplots(figsize=(8, 4))
-        sns.barplot(data=importance_df, x='Importance', y='Feature', ax=ax)
-        ax.set_title("Decision Tree Feature Importance", fontsize=14, fontweight='bold')
-        ax.set_xlabel("Importance", fontsize=12)
-        ax.set_ylabel("Feature", fontsize=12)
-        st.pyplot(fig)
+        with profiler.stage("feature importance plot"):
+            import seaborn as sns
+
+            fig, ax = plt.subplots(figsize=(8, 4))
+            sns.barplot(data=importance_df, x='Importance', y='Feature', ax=ax)
+            ax.set_title("Decision Tree Feature Importance", fontsize=14, fontweight='bold')
+            ax.set_xlabel("Importance", fontsize=12)
+            ax.set_ylabel("Feature", fontsize=12)
+            st.pyplot(fig)
+
+# Rendered plots are cached per input for every session on this server process
+@st.cache_resource
+def get_figure_cache():
+    return FigureCache()
 
 # This code creates an expandable section displaying a correlation heatmap, filtering for numeric columns among the selected features and target, calculates correlations between these variables, and visualizes them as a heatmap using seaborn with a coolwarm color scheme and numerical annotations. Essentially, visualization helps users identify relationships between features, showing which variables are positively or negatively correlated, or displaying an informational message if no numeric columns are available
 st.subheader("Feature Correlation Heatmap 🔗")
 with st.expander("See correlation between selected numeric features 🔍"):
     numeric_cols = df[features + [target]].select_dtypes(include='number')
     if not numeric_cols.empty:
-        corr = numeric_cols.corr()
-        fig, ax = plt.subplots(figsize=(8, 6))
-        sns.heatmap(corr, annot=True, cmap='coolwarm', linewidths=0.5, ax=ax)
-        ax.set_title("Correlation Matrix", fontsize=14, fontweight='bold')
-        st.pyplot(fig)
+        # Rendered heatmaps are cached per correlation matrix; with many features the cell annotations are dropped and features are reordered by clustering so the plot stays readable and fast
+        with profiler.stage("correlation heatmap"):
+            corr = numeric_cols.corr()
+            png = get_figure_cache().get_or_render(
+                ("heatmap", series_fingerprint(pd.Series(corr.to_numpy().ravel())), tuple(corr.columns)),
+                lambda: correlation_heatmap_figure(corr),
+            )
+        st.image(png, width="stretch")
     else:
         st.info("No numeric columns found to plot correlation matrix.")
 
@@ -158,9 +226,13 @@ with st.expander("See correlation between selected numeric features 🔍"):
 st.subheader("Histogram + KDE of a Feature 📊")
 selected_hist_feature = st.selectbox("Choose a feature to explore distribution 📈", features)
 if selected_hist_feature:
-    fig, ax = plt.subplots(figsize=(8, 4))
-    sns.histplot(df[selected_hist_feature], kde=True, color="skyblue", edgecolor="black", ax=ax)
-    ax.set_title(f"Distribution of {selected_hist_feature}", fontsize=14, fontweight='bold')
-    ax.set_xlabel(selected_hist_feature, fontsize=12)
-    ax.set_ylabel("Frequency", fontsize=12)
-    st.pyplot(fig)
\ No newline at end of file
+    # The histogram is drawn from precomputed bins and the KDE is evaluated on a fixed grid with an FFT, so the cost doesn't grow with every point plotted; the rendered image is cached per column contents
+    values = df[selected_hist_feature]
+    with profiler.stage("histogram"):
+        png = get_figure_cache().get_or_render(
+            ("histogram", series_fingerprint(values)),
+            lambda: histogram_kde_figure(values, selected_hist_feature),
+        )
+    st.image(png, width="stretch")
+
+render_panel(st.sidebar, profiler)
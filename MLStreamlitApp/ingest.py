@@ -0,0 +1,179 @@
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+from shared.profiling import PeakRSS
+
+
+@dataclass
+class IngestStats:
+    rows_read: int = 0
+    rows_kept: int = 0
+    chunks: int = 0
+    seconds: float = 0.0
+    # Process resident memory at its peak during ingestion, and how far above the starting RSS that peak was
+    peak_rss_bytes: int = 0
+    rss_growth_bytes: int = 0
+    frame_memory_bytes: int = 0
+    # Columns the sample read as numbers that turned out to hold text further down, and were re-read as text
+    retyped_columns: list = field(default_factory=list)
+
+    @property
+    def rows_per_second(self):
+        return self.rows_read / self.seconds if self.seconds else float("inf")
+
+    def summary(self):
+        parts = [f"{self.rows_kept:,} of {self.rows_read:,} rows kept in {self.seconds:.2f}s ({self.rows_per_second:,.0f} rows/s)"]
+        if self.peak_rss_bytes:
+            parts.append(f"peak RSS {self.peak_rss_bytes / 2**20:,.0f} MB (+{self.rss_growth_bytes / 2**20:,.0f} MB while reading)")
+        parts.append(f"frame {self.frame_memory_bytes / 2**20:,.1f} MB")
+        if self.retyped_columns:
+            parts.append(f"re-read with {', '.join(map(str, self.retyped_columns))} as text")
+        return " · ".join(parts)
+
+
+@dataclass
+class IngestResult:
+    frame: pd.DataFrame
+    stats: IngestStats
+    # Sorted class labels per encoded column, the same thing LabelEncoder.classes_ would hold
+    classes: dict = field(default_factory=dict)
+
+
+class _Vocabulary:
+    """Category -> code mapping that grows as new values show up in later chunks."""
+
+    def __init__(self):
+        self.index = pd.Index([], dtype=object)
+
+    def encode(self, values):
+        new = pd.Index(pd.unique(values)).difference(self.index, sort=False)
+        if len(new):
+            self.index = self.index.append(new.astype(object))
+        return self.index.get_indexer(values).astype(np.int32)
+
+    def sorted_remap(self):
+        # Codes are handed out in order of appearance; remap them so they match LabelEncoder's sorted order
+        order = np.argsort(self.index.to_numpy(dtype=str), kind="stable")
+        remap = np.empty(len(order), dtype=np.int64)
+        remap[order] = np.arange(len(order))
+        return remap, list(self.index[order])
+
+
+def _downcast(series, downcast_floats):
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast="integer")
+    if downcast_floats and pd.api.types.is_float_dtype(series):
+        return pd.to_numeric(series, downcast="float")
+    return series
+
+
+class _NotNumeric(Exception):
+    """A column the sample typed as numeric has a value further down that isn't."""
+
+    def __init__(self, column):
+        super().__init__(column)
+        self.column = column
+
+
+def _numeric_chunk(values, sample_was_bool):
+    """`values` from a numeric column of one chunk as numbers; raises _NotNumeric if any don't parse."""
+    if sample_was_bool:
+        # A missing value turns a bool column into objects; read in full, such a column is text and gets label-encoded
+        if not is_bool_dtype(values):
+            raise _NotNumeric(values.name)
+        return values
+    if is_numeric_dtype(values):
+        return values
+    parsed = pd.to_numeric(values, errors="coerce")
+    if (parsed.isna() & values.notna()).any():
+        raise _NotNumeric(values.name)
+    return parsed
+
+
+def _smallest_int(codes, n_classes):
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_classes <= np.iinfo(dtype).max:
+            return codes.astype(dtype)
+    return codes
+
+
+def _read_chunks(source, chunksize, numeric_cols, categorical_cols, bool_cols, downcast_floats, stats):
+    vocabularies = {col: _Vocabulary() for col in categorical_cols}
+    chunks = []
+    reader = pd.read_csv(source, chunksize=chunksize, dtype={col: str for col in categorical_cols})
+    for chunk in reader:
+        stats.rows_read += len(chunk)
+        stats.chunks += 1
+        for col in numeric_cols:
+            chunk[col] = _numeric_chunk(chunk[col], col in bool_cols)
+        chunk = chunk.dropna()
+        for col in numeric_cols:
+            chunk[col] = _downcast(chunk[col], downcast_floats)
+        for col in categorical_cols:
+            chunk[col] = vocabularies[col].encode(chunk[col].to_numpy())
+        chunks.append(chunk)
+    return chunks, vocabularies
+
+
+def read_csv_chunked(source, chunksize=100_000, sample_rows=10_000, downcast_floats=True, track_memory=True):
+    """Read a CSV in chunks into a compact, model-ready frame.
+
+    Column types are inferred from the first `sample_rows` rows: numeric columns are downcast
+    per chunk, every other column is label-encoded through a vocabulary shared across chunks.
+    Rows with missing values are dropped, matching the in-memory path of the app. If a column
+    the sample read as numeric holds text further down (a zip code like "02139-1234", or a
+    missing value in a True/False column), the file is read again with that column as text,
+    so the result is the same as typing every column from the whole file.
+
+    With `track_memory`, a sampler thread records the process's peak RSS during the read; it
+    doesn't slow the read down, but the number is process-wide, so other sessions' work at the
+    same time shows up in it too.
+    """
+    stats = IngestStats()
+    started = time.perf_counter()
+    rss = PeakRSS() if track_memory else nullcontext()
+
+    with rss:
+        sample = pd.read_csv(source, nrows=sample_rows)
+        numeric_cols = [col for col in sample.columns if is_numeric_dtype(sample[col])]
+        categorical_cols = [col for col in sample.columns if col not in numeric_cols]
+        bool_cols = {col for col in numeric_cols if is_bool_dtype(sample[col])}
+        columns = list(sample.columns)
+        del sample
+
+        while True:
+            if hasattr(source, "seek"):
+                source.seek(0)
+            stats.rows_read = stats.chunks = 0
+            try:
+                chunks, vocabularies = _read_chunks(source, chunksize, numeric_cols, categorical_cols, bool_cols,
+                                                    downcast_floats, stats)
+                break
+            except _NotNumeric as e:
+                # Rare (the sample has to miss every text value), so starting over beats keeping raw text for every numeric column
+                numeric_cols.remove(e.column)
+                categorical_cols.append(e.column)
+                stats.retyped_columns.append(e.column)
+
+        frame = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=columns)
+        del chunks
+
+        classes = {}
+        for col in categorical_cols:
+            remap, classes[col] = vocabularies[col].sorted_remap()
+            if len(frame):
+                frame[col] = _smallest_int(remap[frame[col].to_numpy()], len(remap))
+
+        stats.rows_kept = len(frame)
+        stats.frame_memory_bytes = int(frame.memory_usage(deep=True).sum())
+    stats.seconds = time.perf_counter() - started
+    if track_memory:
+        stats.peak_rss_bytes = rss.peak
+        stats.rss_growth_bytes = max(rss.peak - rss.start, 0)
+
+    return IngestResult(frame=frame, stats=stats, classes=classes)
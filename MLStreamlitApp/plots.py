@@ -0,0 +1,95 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+# Number of points of the fixed grid the KDE is evaluated on
+KDE_GRID_SIZE = 1024
+# Above this many features the heatmap drops per-cell annotations and gets clustered
+HEATMAP_ANNOTATION_LIMIT = 20
+
+
+def series_fingerprint(values):
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(pd.util.hash_pandas_object(values, index=False).to_numpy().tobytes())
+    digest.update(str(getattr(values, "name", "")).encode())
+    return digest.hexdigest()
+
+
+def fft_kde(values, grid_size=KDE_GRID_SIZE):
+    """Gaussian KDE on a fixed grid using linear binning and an FFT convolution.
+
+    Uses Scott's rule for the bandwidth like scipy's gaussian_kde (and so seaborn), but
+    costs O(n + grid log grid) instead of O(n * grid). Returns (grid, density).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    bandwidth = values.std(ddof=1) * n ** (-1 / 5) if n > 1 else 0.0
+    if bandwidth <= 0:
+        return np.array([values.mean()] * 2), np.zeros(2)
+
+    # seaborn extends the curve 3 bandwidths past the data
+    lo, hi = values.min() - 3 * bandwidth, values.max() + 3 * bandwidth
+    grid = np.linspace(lo, hi, grid_size)
+    step = grid[1] - grid[0]
+
+    # Linear binning: every value splits its weight between the two nearest grid points
+    position = (values - lo) / step
+    left = np.clip(np.floor(position).astype(np.int64), 0, grid_size - 2)
+    right_weight = position - left
+    weights = np.bincount(left, weights=1 - right_weight, minlength=grid_size)
+    weights += np.bincount(left + 1, weights=right_weight, minlength=grid_size)
+
+    offsets = np.arange(-grid_size + 1, grid_size) * step
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2) / (bandwidth * np.sqrt(2 * np.pi))
+    size = 2 * grid_size - 1 + grid_size - 1
+    density = np.fft.irfft(np.fft.rfft(weights, size) * np.fft.rfft(kernel, size), size)
+    density = density[grid_size - 1:2 * grid_size - 1] / n
+    return grid, np.maximum(density, 0)
+
+
+def histogram_kde_figure(values, feature):
+    """Histogram with a KDE overlay, from precomputed bins and the FFT KDE instead of per-point drawing."""
+    import matplotlib.pyplot as plt
+
+    values = pd.Series(values).dropna().to_numpy(dtype=np.float64)
+    edges = np.histogram_bin_edges(values, bins="auto")
+    if len(edges) > 10_001:
+        edges = np.linspace(edges[0], edges[-1], 10_001)
+    counts, edges = np.histogram(values, bins=edges)
+    grid, density = fft_kde(values)
+
+    fig, ax = plt.subplots(figsize=(8, 4))
+    ax.bar(edges[:-1], counts, width=np.diff(edges), align="edge", color="skyblue", edgecolor="black", alpha=0.75)
+    # Scale the density to the histogram's count axis, as seaborn's histplot(kde=True) does
+    ax.plot(grid, density * len(values) * np.diff(edges).mean(), color="skyblue")
+    ax.set_title(f"Distribution of {feature}", fontsize=14, fontweight='bold')
+    ax.set_xlabel(feature, fontsize=12)
+    ax.set_ylabel("Frequency", fontsize=12)
+    return fig
+
+
+def correlation_heatmap_figure(corr):
+    """Correlation heatmap; above HEATMAP_ANNOTATION_LIMIT features it is clustered and left unannotated."""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    if len(corr) <= HEATMAP_ANNOTATION_LIMIT:
+        fig, ax = plt.subplots(figsize=(8, 6))
+        sns.heatmap(corr, annot=True, cmap='coolwarm', linewidths=0.5, ax=ax)
+        ax.set_title("Correlation Matrix", fontsize=14, fontweight='bold')
+        return fig
+
+    from scipy.cluster.hierarchy import leaves_list, linkage
+    from scipy.spatial.distance import squareform
+
+    # Order features by a hierarchical clustering on 1 - |corr| so correlated blocks sit together
+    distance = 1 - np.abs(np.nan_to_num(corr.to_numpy()))
+    np.fill_diagonal(distance, 0)
+    order = leaves_list(linkage(squareform(np.clip(distance, 0, None), checks=False), "average"))
+    clustered = corr.iloc[order, order]
+
+    fig, ax = plt.subplots(figsize=(12, 10))
+    sns.heatmap(clustered, cmap='coolwarm', vmin=-1, vmax=1, ax=ax)
+    ax.set_title("Correlation Matrix (clustered)", fontsize=14, fontweight='bold')
+    return fig
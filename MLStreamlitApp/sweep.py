@@ -0,0 +1,184 @@
+"""Headless hyperparameter sweeps for the supervised app.
+
+Runs the same load -> encode -> train_test_split -> fit -> metrics pipeline as the
+"Train Model" button over a grid of max_depth / max_iter / test_size values, spread over a
+process pool, and writes one row per run to JSON or Parquet.
+
+The CSV is read once, by the parent process, and its encoded columns are written to a
+temporary directory as .npy files that every worker memory-maps. Workers therefore share one
+copy of the data through the page cache instead of each parsing and holding the file.
+
+Example:
+    python sweep.py data.csv --target species --max-depth 2 4 8 16 --max-iter 100 500 \\
+        --test-size 0.2 0.3 --output results.parquet
+"""
+import argparse
+import importlib.util
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from sklearn.utils.multiclass import type_of_target
+
+# Run as a script from this folder, and the Iris sample and ingest's profiler are in shared/ at the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from ingest import read_csv_chunked
+from shared.sample_data import load_iris_frame
+from training import ResultCache, data_fingerprint, result_key, train_and_evaluate
+
+MODELS = {"decision-tree": "Decision Tree", "logistic-regression": "Logistic Regression"}
+
+# Set in every worker by _init_worker, so the dataset is mapped once per process instead of pickled into every task
+_worker_state = {}
+
+
+def load_dataset(source):
+    """Load a CSV through the app's chunked ingestion, or the Iris sample for source == "iris"."""
+    if source == "iris":
+        return load_iris_frame()
+    return read_csv_chunked(source, track_memory=False).frame
+
+
+def build_grid(models, max_depths, max_iters, test_sizes):
+    grid = []
+    for model, test_size in itertools.product(models, test_sizes):
+        if model == "Decision Tree":
+            grid += [(model, {"max_depth": depth}, test_size) for depth in max_depths]
+        else:
+            grid += [(model, {"max_iter": max_iter}, test_size) for max_iter in max_iters]
+    return grid
+
+
+def save_columns(df, directory):
+    """Write every column to `directory` as <position>.npy, for load_columns to memory-map."""
+    for i, col in enumerate(df.columns):
+        # Ingested frames are all numeric (text columns come back label-encoded), so no pickling is involved
+        np.save(os.path.join(directory, f"{i}.npy"), df[col].to_numpy(), allow_pickle=False)
+
+
+def load_columns(directory, columns):
+    # copy=False keeps the read-only memory maps as the frame's columns
+    return pd.DataFrame(
+        {col: np.load(os.path.join(directory, f"{i}.npy"), mmap_mode="r") for i, col in enumerate(columns)},
+        copy=False,
+    )
+
+
+def _init_worker(data_dir, features, target, fingerprint, cache_dir):
+    df = load_columns(data_dir, features + [target])
+    _worker_state.update(
+        df=df,
+        X=df[features],
+        y=df[target],
+        features=features,
+        target=target,
+        fingerprint=fingerprint,
+        cache=ResultCache(cache_dir) if cache_dir else None,
+    )
+
+
+def _run(model_option, params, test_size):
+    state = _worker_state
+    started = time.perf_counter()
+    compute = lambda: train_and_evaluate(state["X"], state["y"], model_option, params, test_size)
+    if state["cache"] is None:
+        result, cached = compute(), False
+    else:
+        key = result_key(state["df"], state["features"], state["target"], model_option, params, test_size,
+                         fingerprint=state["fingerprint"])
+        result, cached = state["cache"].get_or_compute(key, compute)
+    return {
+        "model": model_option,
+        **{name: params.get(name) for name in ("max_depth", "max_iter")},
+        "test_size": test_size,
+        "accuracy": float(result.accuracy),
+        "confusion_matrix": result.confusion_matrix.tolist(),
+        "classification_report": result.classification_report,
+        "seconds": time.perf_counter() - started,
+        "cached": cached,
+    }
+
+
+def run_sweep(source, target, features=None, models=tuple(MODELS.values()), max_depths=(5,), max_iters=(100,),
+              test_sizes=(0.2,), workers=None, cache_dir=None):
+    """Run every grid point in a process pool and return the results as a DataFrame sorted by accuracy."""
+    df = load_dataset(source)
+    if target not in df.columns:
+        raise ValueError(f"Target column {target!r} not found")
+    features = list(features or [col for col in df.columns if col != target])
+    missing = [col for col in features if col not in df.columns]
+    if missing:
+        raise ValueError(f"Feature columns not found: {missing}")
+    if type_of_target(df[target]) not in ["binary", "multiclass"]:
+        raise ValueError("For classification, choose a categorical target (e.g., species/class labels).")
+
+    grid = build_grid(models, max_depths, max_iters, test_sizes)
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="sweep-") as data_dir:
+        selected = df[features + [target]]
+        save_columns(selected, data_dir)
+        fingerprint = data_fingerprint(selected) if cache_dir else None
+        del df, selected
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(data_dir, features, target, fingerprint, cache_dir)) as pool:
+            futures = [pool.submit(_run, *point) for point in grid]
+            for future in as_completed(futures):
+                rows.append(future.result())
+                print(f"[{len(rows)}/{len(grid)}] {rows[-1]['model']} accuracy={rows[-1]['accuracy']:.4f}", file=sys.stderr)
+    results = pd.DataFrame(rows).astype({"max_depth": "Int64", "max_iter": "Int64"})
+    return results.sort_values("accuracy", ascending=False, ignore_index=True)
+
+
+def parquet_engine_available():
+    # pandas writes Parquet through either of these; neither is a dependency of the app
+    return any(importlib.util.find_spec(engine) is not None for engine in ("pyarrow", "fastparquet"))
+
+
+def write_results(results, path):
+    if path.endswith(".parquet"):
+        results.assign(confusion_matrix=results["confusion_matrix"].map(json.dumps)).to_parquet(path, index=False)
+    else:
+        results.to_json(path, orient="records", indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", help='CSV file to train on, or "iris" for the sample dataset')
+    parser.add_argument("--target", required=True, help="target column")
+    parser.add_argument("--features", nargs="+", help="feature columns (default: every other column)")
+    parser.add_argument("--model", nargs="+", choices=MODELS, default=list(MODELS), help="models to sweep")
+    parser.add_argument("--max-depth", nargs="+", type=int, default=[5], help="Decision Tree max_depth values")
+    parser.add_argument("--max-iter", nargs="+", type=int, default=[100], help="Logistic Regression max_iter values")
+    parser.add_argument("--test-size", nargs="+", type=float, default=[0.2], help="test_size values")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes (default: all cores)")
+    parser.add_argument("--cache-dir", help="reuse and fill an on-disk result cache in this directory (the app uses ~/.cache/mlstreamlitapp/results)")
+    parser.add_argument("--output", default="sweep_results.json", help="output file, .json or .parquet")
+    args = parser.parse_args(argv)
+    # Checked before the sweep, not after hours of training
+    if args.output.endswith(".parquet") and not parquet_engine_available():
+        parser.error("writing .parquet needs pyarrow (pip install pyarrow); use a .json output instead")
+
+    try:
+        results = run_sweep(
+            args.source, args.target, features=args.features, models=[MODELS[m] for m in args.model],
+            max_depths=args.max_depth, max_iters=args.max_iter, test_sizes=args.test_size,
+            workers=args.workers, cache_dir=args.cache_dir,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    write_results(results, args.output)
+    print(f"Wrote {len(results)} results to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+import hashlib
+import json
+import os
+import pickle
+import stat
+import threading
+import time
+import warnings
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+RANDOM_STATE = 42
+# A temporary cache file this old is left over from a write that died before its rename, not one still in progress
+STALE_TMP_SECONDS = 15 * 60
+
+
+def sklearn_version():
+    # Read from the package metadata, so building a cache key doesn't import scikit-learn
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        return version("scikit-learn")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def default_cache_dir():
+    """Per-user result cache directory, under $XDG_CACHE_HOME or ~/.cache."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "mlstreamlitapp", "results")
+
+
+def private_directory(path):
+    """Create `path` with mode 0o700 and return it, or None if it isn't private to this user.
+
+    The cache unpickles whatever it finds in its directory, so a directory another user
+    created first, could write to, or swapped for a symlink is refused rather than fixed up.
+    """
+    try:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        info = os.lstat(path)
+    except OSError:
+        return None
+    if not stat.S_ISDIR(info.st_mode):
+        return None
+    if hasattr(os, "getuid") and (info.st_uid != os.getuid() or info.st_mode & 0o077):
+        return None
+    return path
+
+
+@dataclass
+class TrainingResult:
+    model: object
+    accuracy: float
+    confusion_matrix: np.ndarray
+    classification_report: str
+
+
+def build_model(model_option, params):
+    # Imported here so loading the app (and the result cache) doesn't import scikit-learn
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.tree import DecisionTreeClassifier
+
+    if model_option == "Decision Tree":
+        return DecisionTreeClassifier(max_depth=params["max_depth"], random_state=RANDOM_STATE)
+    return LogisticRegression(max_iter=params["max_iter"])
+
+
+def train_and_evaluate(X, y, model_option, params, test_size, progress=None):
+    """Split, fit and score one model exactly the way the "Train Model" button does.
+
+    `progress(fraction, message)` is called before each step; a background job passes its
+    report() here, which is also where a cancelled job stops.
+    """
+    from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
+    from sklearn.model_selection import train_test_split
+
+    progress = progress or (lambda fraction, message: None)
+    progress(0.0, "Splitting the data")
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=RANDOM_STATE)
+    model = build_model(model_option, params)
+    progress(0.1, f"Fitting the {model_option}")
+    model.fit(X_train, y_train)
+    progress(0.8, "Scoring on the test set")
+    predictions = model.predict(X_test)
+    return TrainingResult(
+        model=model,
+        accuracy=accuracy_score(y_test, predictions),
+        confusion_matrix=confusion_matrix(y_test, predictions),
+        classification_report=classification_report(y_test, predictions, zero_division=0),
+    )
+
+
+def data_fingerprint(df):
+    """Content hash of a frame: values, index, column names and dtypes."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    digest.update(json.dumps([[str(col), str(dtype)] for col, dtype in df.dtypes.items()]).encode())
+    return digest.hexdigest()
+
+
+def result_key(df, features, target, model_option, params, test_size, fingerprint=None):
+    """Cache key for one training run; pass `fingerprint` (data_fingerprint of the feature and target columns) to skip hashing the data again."""
+    config = {
+        "features": list(features),
+        "target": target,
+        "model": model_option,
+        "params": params,
+        "test_size": round(float(test_size), 6),
+        "random_state": RANDOM_STATE,
+        # Pickled models only load reliably into the scikit-learn version that wrote them
+        "sklearn": sklearn_version(),
+    }
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update((fingerprint or data_fingerprint(df[list(features) + [target]])).encode())
+    digest.update(json.dumps(config, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Two-level LRU cache for training results.
+
+    Results live in memory (up to `max_entries`) and are also pickled to `directory`, which
+    is trimmed back to `max_disk_bytes` by evicting the least recently used files. Disk
+    entries survive restarts and are shared by every worker pointed at the same directory.
+    The directory defaults to a per-user one (see default_cache_dir) and must be private to
+    this user; otherwise the disk layer is switched off and only the memory layer is used.
+    """
+
+    def __init__(self, directory=None, max_entries=32, max_disk_bytes=256 * 2**20):
+        requested = directory or default_cache_dir()
+        self.directory = private_directory(requested)
+        if self.directory is None:
+            warnings.warn(f"Not using {requested} for cached results: it isn't a directory private to this user")
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+
+        if self.directory is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                result = pickle.load(f)
+            # Touching the file keeps disk eviction in least-recently-used order
+            os.utime(path)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+            self._remember(key, result)
+        return result
+
+    def put(self, key, result):
+        with self._lock:
+            self._remember(key, result)
+        if self.directory is None:
+            return
+        tmp_path = self._path(key) + f".{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+            self._trim_disk()
+        except OSError:
+            # The in-memory layer still works when the cache directory isn't writable
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def get_or_compute(self, key, compute):
+        """Return (result, hit) for `key`, computing and storing the result on a miss."""
+        result = self.get(key)
+        if result is not None:
+            return result, True
+        result = compute()
+        self.put(key, result)
+        return result, False
+
+    def _remember(self, key, result):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _trim_disk(self):
+        entries = []
+        total = 0
+        now = time.time()
+        for name in os.listdir(self.directory):
+            if not name.endswith((".pkl", ".tmp")):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                info = os.stat(path)
+                if name.endswith(".tmp") and now - info.st_mtime > STALE_TMP_SECONDS:
+                    os.remove(path)
+                    continue
+            except OSError:
+                continue
+            total += info.st_size
+            # A recent .tmp file is another worker's write in progress: it counts toward the budget, but isn't an entry to evict
+            if name.endswith(".pkl"):
+                entries.append((info.st_mtime, info.st_size, name))
+        for _, size, name in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            total -= size
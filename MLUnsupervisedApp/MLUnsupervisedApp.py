@@ -1,15 +1,35 @@
+import os
+import sys
+
+# Make shared/ (at the repository root, one level above this folder) importable when started with `streamlit run`
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
 import streamlit as st
 import pandas as pd
-import numpy as np
-from sklearn.datasets import load_iris
-from sklearn.cluster import KMeans
-from sklearn.decomposition import PCA
-from sklearn.metrics import silhouette_score
-from sklearn.preprocessing import StandardScaler
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.cluster import AgglomerativeClustering
-from scipy.cluster.hierarchy import dendrogram, linkage
+
+from shared.profiling import render_panel, session_profiler
+
+# Every stage of this rerun is timed (wall time, CPU time, peak memory) for the profiling panel at the bottom of the sidebar
+profiler = session_profiler("unsupervised")
+
+# The pipeline modules only import scikit-learn, SciPy's clustering and the plotting libraries inside the functions that use them, so the first render (data preview and preprocessing) doesn't wait for libraries that only a trained model needs. matplotlib and the dendrogram are likewise imported in the branches that draw them
+with profiler.stage("imports"):
+    from elbow import MINIBATCH_THRESHOLD, PARALLEL, WARM, ElbowEngine, array_fingerprint
+    from hierarchical import TWO_STAGE_THRESHOLD, HierarchyEngine
+    from pca_service import PCAService
+    from plots import cluster_scatter_figure
+    from preprocessing import PreprocessingCache
+    from shared.figures import FigureCache
+    from shared.jobs import JobExecutor, background_job
+    from shared.sample_data import load_iris_frame
+    from silhouette import EXACT_THRESHOLD, silhouette
+
+# Encoded/scaled feature matrices are shared by every session on this server process
+@st.cache_resource
+def get_preprocessing_cache():
+    return PreprocessingCache()
 
 # Basic Layout
 st.set_page_config(page_title="Unsupervised Machine Learning App", layout="wide")
@@ -17,16 +37,22 @@ st.title("Unsupervised Machine Learning App")
 st.sidebar.header("📁 Data Source")
 data_option = st.sidebar.radio("Choose data source:", ["Sample Iris Dataset", "Upload CSV"])
 
+# The Iris sample is loaded once per server process instead of on every rerun
+@st.cache_data
+def load_sample_data():
+    return load_iris_frame().drop(columns="target")
+
 # If the user chooses "Upload CSV," it displays a file uploader in the sidebar that accepts CSV files. When a file is uploaded, it reads the data into a pandas DataFrame; if no file is uploaded, it stops execution. If another data option is selected, it loads the built-in Iris dataset and converts it to a DataFrame with appropriate column names from the original feature name
 if data_option == "Upload CSV":
     uploaded_file = st.sidebar.file_uploader("Upload your CSV", type=["csv"])
     if uploaded_file:
-        df = pd.read_csv(uploaded_file)
+        with profiler.stage("load csv"):
+            df = pd.read_csv(uploaded_file)
     else:
         st.stop()
 else:
-    data = load_iris()
-    df = pd.DataFrame(data.data, columns=data.feature_names)
+    with profiler.stage("load sample"):
+        df = load_sample_data()
 
 st.subheader("📄 Dataset Preview")
 st.write(df.sample(10))
@@ -37,28 +63,60 @@ if len(features) < 2:
     st.warning("Select at least 2 features.")
     st.stop()
 
-X = df[features]
-
 # Preprocessing data - Allows for categorical data
 # I included code to prepare user data for modeling. First, I convert any categorical features into numeric ones using one-hot encoding with pd.get_dummies(), and I drop the first category to avoid multicollinearity. Then I remove any rows with missing values
 # I added a safety check to make sure user's dataset isn't empty after these operations. If it is, it'll show them an error message and stop execution so user can select different features
 # After cleaning the data, I standardize all features using StandardScaler() to ensure they're on the same scale. This is important for many machine learning algorithms, especially those that rely on distances between data points or regularization
+# The result (a read-only float32 matrix, sparse when one-hot columns dominate, plus the scaling statistics) is cached per dataset and feature selection, so reruns that only change a slider or a plot reuse it and every model branch reads the same matrix without copying it
+preprocessing_cache = get_preprocessing_cache()
+data_key = uploaded_file.file_id if data_option == "Upload CSV" else "sample-iris"
+with profiler.stage("encode + scale"):
+    prepared = preprocessing_cache.get(df, features, data_key=data_key)
+st.sidebar.caption(f"Preprocessing cache: {preprocessing_cache.hits} hits / {preprocessing_cache.misses} misses")
 
-X = pd.get_dummies(X, drop_first=True)
-X = X.dropna()
-
-if X.empty:
+if prepared.empty:
     st.error("Selected features result in an empty dataset after encoding. Please choose valid features.")
     st.stop()
 
-X = X.dropna()
-X_scaled = StandardScaler().fit_transform(X)
+X_scaled = prepared.matrix
+n_rows = len(prepared)
+
+# One elbow engine per server process, so memoized KMeans fits are shared across reruns and sessions
+@st.cache_resource
+def get_elbow_engine():
+    return ElbowEngine()
+
+# Same idea for hierarchical clustering: one memoized Ward tree per dataset
+@st.cache_resource
+def get_hierarchy_engine():
+    return HierarchyEngine()
+
+# And one PCA service, holding a single decomposition per dataset that every PCA view slices
+@st.cache_resource
+def get_pca_service():
+    return PCAService()
+
+# Rendered scatter plots, cached per data and cluster labels
+@st.cache_resource
+def get_figure_cache():
+    return FigureCache()
+
+# Fitting runs on a thread pool shared by every session instead of on this script's thread: clicking Train submits a job and the page stays responsive while a fragment polls its progress. Sessions that train the same data with the same settings share one job
+@st.cache_resource
+def get_job_executor():
+    return JobExecutor()
 
 # My app provides an intuitive sidebar interface with a brain emoji header where you can select your preferred unsupervised learning algorithm from three options (KMeans, PCA, or Hierarchical Clustering)
 st.sidebar.header("🧠 Model & Hyperparameters 🎚️")
 model_type = st.sidebar.selectbox("Choose model", ["KMeans", "PCA", "Hierarchical Clustering"])
 train_button = st.button("🚀 Train Model")
 
+# Silhouette settings for the clustering models. The exact score compares every pair of rows, which grows quadratically, so larger datasets default to an estimate from a stratified per-cluster sample, reported with a 95% confidence interval
+if model_type in ["KMeans", "Hierarchical Clustering"]:
+    st.sidebar.subheader("Silhouette Score")
+    exact_silhouette = st.sidebar.checkbox("Exact silhouette score (slow on large datasets)", value=n_rows <= EXACT_THRESHOLD)
+    silhouette_sample = st.sidebar.slider("Sample size for the estimated silhouette score", 500, 20000, 2000, step=500, disabled=exact_silhouette)
+
 # This code allows users to perform KMeans clustering analysis with configurable parameters, offering an elbow plot to help identify the optimal number of clusters and visualizing results through PCA-reduced scatter plots that show how data points group together, along with silhouette scores to evaluate clustering qualities
 if model_type == "KMeans":
     st.subheader("🐑 KMeans Clustering")
@@ -69,19 +127,56 @@ if model_type == "KMeans":
     st.sidebar.subheader("Max Clusters for KMeans")
     k = st.sidebar.slider("Number of clusters: sets how many groups the algorithm will divide the data into", 2, max_clusters, 3)
 
+    # Elbow sweep settings: parallel fits run every k independently across all cores, warm-started fits seed each k from the k-1 solution, which is faster but can land in worse local minima and put bumps in the curve. MiniBatchKMeans is switched on by default for large datasets
+    st.sidebar.subheader("Elbow Sweep")
+    sweep_option = st.sidebar.selectbox("How to fit the k values of the elbow plot", ["Parallel (independent fits)", "Warm-started (faster, approximate)"])
+    strategy = WARM if sweep_option.startswith("Warm") else PARALLEL
+    minibatch = st.sidebar.checkbox("Use MiniBatchKMeans (faster on large datasets)", value=n_rows >= MINIBATCH_THRESHOLD)
+
+    config = ("KMeans", prepared.fingerprint, k, max_clusters, strategy, minibatch, exact_silhouette, silhouette_sample)
+    submit = None
     if train_button:
-        # Fit User's selected model with K clusters
-        model = KMeans(n_clusters=k, random_state=42).fit(X_scaled)
-        labels = model.predict(X_scaled)
+        engine, pca_service = get_elbow_engine(), get_pca_service()
+        ks = range(2, max_clusters + 1)
+
+        def kmeans_job(job):
+            # Fit User's selected model with K clusters. Every fit goes through the shared elbow engine, which memoizes models per dataset and k, so the chosen k is reused by the elbow sweep below and moving the slider only fits the new k values. The chosen k is always an independent fit, so a warm-started sweep only approximates the elbow curve, never the clusters shown
+            fitted, new_fits = {}, []
+
+            def on_fit(k_fitted, model):
+                fitted[k_fitted] = model.inertia_
+                new_fits.append(k_fitted)
+                job.report(0.3 + 0.6 * len(fitted) / len(ks), f"Elbow sweep: fitted k={k_fitted}", inertias=dict(fitted))
+
+            with job.step("kmeans fit"):
+                job.report(0.0, f"Fitting KMeans with {k} clusters")
+                model = engine.fit(X_scaled, k, fingerprint=prepared.fingerprint, minibatch=minibatch, strategy=PARALLEL, on_fit=on_fit)
+                labels = model.predict(X_scaled)
+            with job.step("silhouette"):
+                job.report(0.2, "Scoring the clusters")
+                silhouette_estimate = silhouette(X_scaled, labels, sample_size=silhouette_sample, exact=exact_silhouette)
+            # Find eblow plot values for each k until max_clusters; each k is streamed to the progress view as it is fitted
+            with job.step("elbow sweep"):
+                job.report(0.3, "Elbow sweep")
+                sse = engine.inertias(X_scaled, ks, fingerprint=prepared.fingerprint, minibatch=minibatch, strategy=strategy, on_fit=on_fit)
+            with job.step("pca"):
+                job.report(0.9, "Projecting onto 2 principal components")
+                X_pca = pca_service.decomposition(X_scaled, fingerprint=prepared.fingerprint).projection(2)
+            return {"labels": labels, "silhouette": silhouette_estimate, "sse": sse, "X_pca": X_pca, "new_fits": len(new_fits)}
+
+        submit = (config, kmeans_job, "KMeans")
+
+    def show_elbow_progress(partial):
+        if partial.get("inertias"):
+            st.line_chart(pd.Series(partial["inertias"], name="Inertia").sort_index(), height=200)
+
+    job = background_job(get_job_executor(), "training", config, submit, render_partial=show_elbow_progress, profiler=profiler)
+    if job is not None:
+        labels, silhouette_estimate, sse, X_pca = (job.result[key] for key in ("labels", "silhouette", "sse", "X_pca"))
         st.caption(f"Kmeans completed with {k} clusters.")
-        silhouette = silhouette_score(X_scaled, labels)
-        st.success(f"Silhouette Score: `{silhouette:.3f}`")
-        
-        # Find eblow plot values for each k until max_clusters
-        sse = []
-        for i in range(2, max_clusters + 1):
-            km = KMeans(n_clusters=i, random_state=42).fit(X_scaled)
-            sse.append(km.inertia_)
+        st.success(f"Silhouette Score: `{silhouette_estimate.score:.3f}`")
+        st.caption(silhouette_estimate.summary())
+        st.caption(f"New KMeans fits for this job: {job.result['new_fits']} (the rest came from the cache).")
 
         # Plot the elbow k-means values
         st.subheader("📈 Elbow Method")
@@ -94,12 +189,15 @@ if model_type == "KMeans":
         )
         
         # I create a wide figure with  Elbow Plot showing how the sum of squared distances (inertia) changes as  number of clusters increases, helping user visually identify the optimal point where adding more clusters provides diminishing returns.
-        fig, ax = plt.subplots(figsize=(13,5))
-        ax.plot(range(2, max_clusters + 1), sse, marker='o')
-        ax.set_title("Elbow Plot")
-        ax.set_xlabel("Number of Clusters")
-        ax.set_ylabel("Inertia")
-        st.pyplot(fig)
+        with profiler.stage("elbow plot"):
+            import matplotlib.pyplot as plt
+
+            fig, ax = plt.subplots(figsize=(13,5))
+            ax.plot(range(2, max_clusters + 1), sse, marker='o')
+            ax.set_title("Elbow Plot")
+            ax.set_xlabel("Number of Clusters")
+            ax.set_ylabel("Inertia")
+            st.pyplot(fig)
 
         # Visualize using 2 PCA Projection
         st.subheader("📊 PCA Visualization")
@@ -110,30 +208,52 @@ if model_type == "KMeans":
             """
         )
         
-        # I reduce the dimensionality of your standardized data to two principal components using PCA, coverting the transformed data into a DataFrame with labeled columns for easier handling, and adds the cluster assignments as a third column to prepare for visualization of how user data naturally groups
-        pca = PCA(n_components=2)
-        X_pca = pca.fit_transform(X_scaled)
+        # I reduce the dimensionality of your standardized data to two principal components using PCA (in the job above), coverting the transformed data into a DataFrame with labeled columns for easier handling, and adds the cluster assignments as a third column to prepare for visualization of how user data naturally groups
         df_vis = pd.DataFrame(X_pca, columns=["PC1", "PC2"])
         df_vis["Cluster"] = labels
         
         # App creates a wide figure (13×5) and set up an axis for plotting. Using seaborn's scatterplot function, I visualize the PCA-transformed data with PC1 on the x-axis, PC2 on the y-axis, and color-code points by their cluster assignments using the Set2 color palette. I display the finished visualization
-        fig2, ax2 = plt.subplots(figsize=(13,5))
-        sns.scatterplot(data=df_vis, x="PC1", y="PC2", hue="Cluster", palette="Set2", ax=ax2)
-        ax2.set_title("Clusters (PCA)")
-        st.pyplot(fig2)
+        # Above 50k points the scatter is drawn as a density image (each pixel coloured by its dominant cluster) instead of one marker per point, and the rendered plot is cached per data and labels
+        with profiler.stage("scatter plot"):
+            png = get_figure_cache().get_or_render(
+                ("scatter", prepared.fingerprint, array_fingerprint(labels), "Set2"),
+                lambda: cluster_scatter_figure(df_vis, "Set2", "Clusters (PCA)"),
+            )
+        st.image(png, width="stretch")
 # This code allows users to perform hierarchical clustering analysis by selecting their desired number of clusters, then provides comprehensive visualization tools including PCA-projected cluster plots and dendrograms that reveal the hierarchical structure of their data, along with silhouette scores to evaluate clustering quality 
 elif model_type == "Hierarchical Clustering":
     st.subheader("🌲 Hierarchical Clustering")
     st.sidebar.subheader("Number of Clusters")
     k = st.sidebar.slider("Number of clusters", 2, 10, 3)
+    two_stage = st.sidebar.checkbox("Two-stage mode: Ward on micro-cluster centroids (for large datasets)", value=n_rows > TWO_STAGE_THRESHOLD)
 
+    config = ("Hierarchical Clustering", prepared.fingerprint, k, two_stage, exact_silhouette, silhouette_sample)
+    submit = None
     if train_button:
-        # Use agglomerative clustering with K clusters
-        model = AgglomerativeClustering(n_clusters=k)
-        labels = model.fit_predict(X_scaled)
+        hierarchy_engine, pca_service = get_hierarchy_engine(), get_pca_service()
+
+        def hierarchical_job(job):
+            # Build the Ward tree once (memoized per dataset) and cut it into K clusters. The same tree feeds the dendrogram below, so it is never computed twice, and changing K only re-cuts it. In two-stage mode the rows are first grouped into micro-clusters with MiniBatchKMeans and Ward runs on their size-weighted centroids
+            with job.step("linkage"):
+                job.report(0.0, "Building the Ward tree")
+                tree = hierarchy_engine.hierarchy(X_scaled, two_stage=two_stage, fingerprint=prepared.fingerprint)
+                labels = tree.labels(k)
+            with job.step("silhouette"):
+                job.report(0.6, "Scoring the clusters")
+                silhouette_estimate = silhouette(X_scaled, labels, sample_size=silhouette_sample, exact=exact_silhouette)
+            with job.step("pca"):
+                job.report(0.9, "Projecting onto 2 principal components")
+                X_pca = pca_service.decomposition(X_scaled, fingerprint=prepared.fingerprint).projection(2)
+            return {"tree": tree, "labels": labels, "silhouette": silhouette_estimate, "X_pca": X_pca}
+
+        submit = (config, hierarchical_job, "Hierarchical clustering")
+
+    job = background_job(get_job_executor(), "training", config, submit, profiler=profiler)
+    if job is not None:
+        tree, labels, silhouette_estimate, X_pca = (job.result[key] for key in ("tree", "labels", "silhouette", "X_pca"))
         st.caption(f"Hierarchical Clustering done with {k} clusters.")
-        score = silhouette_score(X_scaled, labels)
-        st.success(f"Silhouette Score: `{score:.3f}`")
+        st.success(f"Silhouette Score: `{silhouette_estimate.score:.3f}`")
+        st.caption(silhouette_estimate.summary())
 
         # Visualize 2 PCA Projection
         st.subheader("📊 PCA Visualization")
@@ -144,17 +264,17 @@ elif model_type == "Hierarchical Clustering":
             """
         )
         
-        # I apply Principal Component Analysis to reduce user's standardized data to two dimensions, transform the results into a DataFrame with columns labeled "PC1" and "PC2", and add a "Cluster" column containing user's model's cluster assignments to prepare for visualizatio
-        pca = PCA(n_components=2)
-        X_pca = pca.fit_transform(X_scaled)
+        # I apply Principal Component Analysis to reduce user's standardized data to two dimensions (in the job above), transform the results into a DataFrame with columns labeled "PC1" and "PC2", and add a "Cluster" column containing user's model's cluster assignments to prepare for visualizatio
         df_vis = pd.DataFrame(X_pca, columns=["PC1", "PC2"])
         df_vis["Cluster"] = labels
 
         # I create a wide scatter plot that visualizes your clustering results by showing the data points projected onto the first two principal components, with different colors representing each cluster assignment
-        fig4, ax4 = plt.subplots(figsize=(13, 5))
-        sns.scatterplot(data=df_vis, x="PC1", y="PC2", hue="Cluster", palette="Set1", ax=ax4)
-        ax4.set_title("Hierarchical Clustering (PCA Projection)")
-        st.pyplot(fig4)
+        with profiler.stage("scatter plot"):
+            png = get_figure_cache().get_or_render(
+                ("scatter", prepared.fingerprint, array_fingerprint(labels), "Set1"),
+                lambda: cluster_scatter_figure(df_vis, "Set1", "Hierarchical Clustering (PCA Projection)"),
+            )
+        st.image(png, width="stretch")
 
         # I add a section for the dendrogram, include an expanded explanation of what dendrograms show in hierarchical clustering, then generate the visualization using Ward's method to display how your data points merge into clusters, with the height representing similarity levels and limiting display to the last 20 merge steps for clarit
         st.subheader("👑 Dendrogram")
@@ -164,23 +284,42 @@ elif model_type == "Hierarchical Clustering":
             It shows how data points are merged step-by-step, with the height indicating the similarity level between clusters.
             """
         )
-        linked = linkage(X_scaled, 'ward')
-        fig5, ax5 = plt.subplots(figsize=(13, 5))
-        dendrogram(linked, truncate_mode="lastp", p=20, leaf_font_size=10, ax=ax5)
-        ax5.set_title("Hierarchical Clustering Dendrogram")
-        st.pyplot(fig5)
+        with profiler.stage("dendrogram"):
+            import matplotlib.pyplot as plt
+            from scipy.cluster.hierarchy import dendrogram
+
+            fig5, ax5 = plt.subplots(figsize=(13, 5))
+            dendrogram(**tree.dendrogram_kwargs(p=20), leaf_font_size=10, ax=ax5)
+            ax5.set_title("Hierarchical Clustering Dendrogram")
+            st.pyplot(fig5)
 # This code allows users to perform Principal Component Analysis by selecting their desired number of components, then visualizes the results through explained variance charts and transformed data tables to help them understand how their high-dimensional data can be effectively reduced while preserving important information
 elif model_type == "PCA":
     st.subheader("📊 Principal Component Analysis")
     st.sidebar.subheader("PCA Components")
     n_components = st.sidebar.slider("Sets how many principal components to keep, reducing data while preserving most variance", 2, min(len(features), 5), 2)
 
+    # The slider only slices the decomposition, so it isn't part of the job's settings
+    config = ("PCA", prepared.fingerprint)
+    submit = None
     if train_button:
+        pca_service = get_pca_service()
+
+        def pca_job(job):
+            with job.step("pca"):
+                job.report(0.0, "Fitting PCA")
+                return pca_service.decomposition(X_scaled, fingerprint=prepared.fingerprint)
+
+        submit = (config, pca_job, "PCA")
+
+    job = background_job(get_job_executor(), "training", config, submit, profiler=profiler)
+    if job is not None:
         # App displays a confirmation message showing the number of principal components user selected, fit a PCA model to standardized data using that specification, transform the data into the new lower-dimensional space, and calculate the percentage of variance explained by each principal component for further analysis
+        # The decomposition is fitted once per dataset with the most components any view needs; fewer components, the explained variance and the scatter projections of the other branches are all slices of it
+        decomposition = job.result
+        n_components = min(n_components, decomposition.n_components)
         st.caption(f"PCA completed with {n_components} components.")
-        pca = PCA(n_components=n_components)
-        X_pca = pca.fit_transform(X_scaled)
-        explained_var = pca.explained_variance_ratio_
+        X_pca = decomposition.projection(n_components)
+        explained_var = decomposition.explained_variance_ratio(n_components)
         
         # Plot explained variance
         st.subheader("📈 Explained Variance")
@@ -190,12 +329,15 @@ elif model_type == "PCA":
             This bar chart helps you understand how the  contribute tcomponentso the overall variance.
             """
         )
-        fig3, ax3 = plt.subplots(figsize=(13,5))
-        ax3.bar(range(1, n_components + 1), explained_var * 100)
-        ax3.set_title("Explained Variance by Component")
-        ax3.set_xlabel("Principal Component")
-        ax3.set_ylabel("Variance (%)")
-        st.pyplot(fig3)
+        with profiler.stage("explained variance plot"):
+            import matplotlib.pyplot as plt
+
+            fig3, ax3 = plt.subplots(figsize=(13,5))
+            ax3.bar(range(1, n_components + 1), explained_var * 100)
+            ax3.set_title("Explained Variance by Component")
+            ax3.set_xlabel("Principal Component")
+            ax3.set_ylabel("Variance (%)")
+            st.pyplot(fig3)
 
         # Show PCA output
         st.subheader("📊 PCA Output")
@@ -206,4 +348,6 @@ elif model_type == "PCA":
             """
         )
         st.write("PCA Output (first 5 rows):")
-        st.dataframe(pd.DataFrame(X_pca, columns=[f"PC{i+1}" for i in range(n_components)]).head())
\ No newline at end of file
+        st.dataframe(pd.DataFrame(X_pca, columns=[f"PC{i+1}" for i in range(n_components)]).head())
+
+render_panel(st.sidebar, profiler)
@@ -0,0 +1,152 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import scipy.sparse as sp
+
+# scikit-learn, joblib and threadpoolctl are imported where they are used, so importing this module stays cheap for the app's first render
+
+# Rows above which the app suggests MiniBatchKMeans instead of full-batch KMeans
+MINIBATCH_THRESHOLD = 100_000
+
+WARM = "warm"
+PARALLEL = "parallel"
+
+
+def array_fingerprint(X):
+    """Content hash of a dense or CSR matrix, used to key memoized fits."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{X.shape}{X.dtype}{sp.issparse(X)}".encode())
+    parts = (X.data, X.indices, X.indptr) if sp.issparse(X) else (X,)
+    for part in parts:
+        digest.update(memoryview(np.ascontiguousarray(part)).cast("B"))
+    return digest.hexdigest()
+
+
+def _estimator(k, init, minibatch, random_state):
+    from sklearn.cluster import KMeans, MiniBatchKMeans
+
+    n_init = 1 if isinstance(init, np.ndarray) else "auto"
+    if minibatch:
+        return MiniBatchKMeans(n_clusters=k, init=init, n_init=n_init, random_state=random_state, batch_size=4096)
+    return KMeans(n_clusters=k, init=init, n_init=n_init, random_state=random_state)
+
+
+def _fit(X, k, init, minibatch, random_state):
+    model = _estimator(k, init, minibatch, random_state).fit(X)
+    # Labels are an n-length array per k; predict() only needs the centroids, so the memo doesn't keep them
+    model.labels_ = None
+    return model
+
+
+def _fit_k(X, k, minibatch, random_state):
+    from threadpoolctl import threadpool_limits
+
+    # Runs on a joblib worker thread. OpenMP thread counts are per calling thread, so the limit has to be set here for
+    # this fit to run single-threaded and the k values to share the cores instead of oversubscribing them. BLAS pools
+    # are process-wide and are left alone: limiting them would throttle every other session's work (KMeans already
+    # keeps its BLAS calls single-threaded itself)
+    with threadpool_limits(limits=1, user_api="openmp"):
+        return k, _fit(X, k, "k-means++", minibatch, random_state)
+
+
+def _grow_centers(X, centers, k, random_state):
+    """Seed k centroids from a (k-1)-centroid solution by adding one greedy k-means++ point.
+
+    A few candidates are D²-sampled and the one that lowers the potential the most is kept,
+    the same trick sklearn's k-means++ uses for each of its centers.
+    """
+    from sklearn.metrics.pairwise import euclidean_distances
+
+    rng = np.random.default_rng([random_state, k])
+    n = X.shape[0]
+    sq_dist = euclidean_distances(X, centers, squared=True).min(axis=1).astype(np.float64)
+    total = sq_dist.sum()
+    if total <= 0:
+        chosen = rng.integers(n)
+    else:
+        candidates = rng.choice(n, size=2 + int(np.log(k)), p=sq_dist / total)
+        candidate_dist = euclidean_distances(X, X[candidates], squared=True)
+        potentials = np.minimum(sq_dist[:, None], candidate_dist).sum(axis=0)
+        chosen = candidates[int(np.argmin(potentials))]
+    new_center = X[chosen].toarray() if sp.issparse(X) else X[chosen][None, :]
+    return np.vstack([centers, new_center]).astype(centers.dtype)
+
+
+class ElbowEngine:
+    """Memoized KMeans fits for the elbow plot and the chosen k.
+
+    Fits are memoized per (data fingerprint, mode, strategy, k), so extending the elbow range
+    only fits the new k values. Two sweep strategies are available:
+
+    * ``"parallel"`` (the default): every missing k is an independent k-means++ fit (same as
+      the original app), run across all cores at once.
+    * ``"warm"``: k is seeded from the (k-1) solution plus one D²-sampled centroid, so each new
+      k converges in a few iterations. Solutions are built upwards from ``k_min``, which keeps
+      them deterministic no matter in which order the slider is moved. It is a fast
+      approximation: the greedy seeding can settle in a worse local minimum than an
+      independent fit, which shows up as bumps in the elbow curve.
+    """
+
+    def __init__(self, k_min=2, random_state=42, n_jobs=-1, max_datasets=4):
+        self.k_min = k_min
+        self.random_state = random_state
+        self.n_jobs = n_jobs
+        self.max_datasets = max_datasets
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+        self.fits = 0
+
+    def _models(self, fingerprint, minibatch, strategy):
+        key = (fingerprint, bool(minibatch), strategy)
+        with self._lock:
+            models = self._memo.setdefault(key, {})
+            self._memo.move_to_end(key)
+            while len(self._memo) > self.max_datasets:
+                self._memo.popitem(last=False)
+        return models
+
+    def sweep(self, X, ks, fingerprint=None, minibatch=False, strategy=PARALLEL, on_fit=None):
+        """Return {k: fitted model} for every k in `ks`, fitting only the ones not memoized yet.
+
+        `on_fit(k, model)` is called as each new fit completes, so a caller can stream progress
+        (or stop the sweep by raising; the fits completed so far stay memoized).
+        """
+        fingerprint = fingerprint or array_fingerprint(X)
+        models = self._models(fingerprint, minibatch, strategy)
+        ks = sorted(set(ks))
+
+        if strategy == WARM:
+            for k in range(self.k_min, max(ks) + 1):
+                if k in models:
+                    continue
+                previous = models.get(k - 1)
+                init = "k-means++" if previous is None else _grow_centers(X, previous.cluster_centers_, k, self.random_state)
+                models[k] = _fit(X, k, init, minibatch, self.random_state)
+                self.fits += 1
+                if on_fit is not None:
+                    on_fit(k, models[k])
+        else:
+            missing = [k for k in ks if k not in models]
+            if missing:
+                from joblib import Parallel, delayed
+
+                # Each fit runs single-threaded (see _fit_k). Fits are collected as they come in, so each one is memoized and reported without waiting for the slowest k
+                fitted = Parallel(n_jobs=self.n_jobs, prefer="threads", return_as="generator_unordered")(
+                    delayed(_fit_k)(X, k, minibatch, self.random_state) for k in missing
+                )
+                for k, model in fitted:
+                    models[k] = model
+                    self.fits += 1
+                    if on_fit is not None:
+                        on_fit(k, model)
+
+        return {k: models[k] for k in ks}
+
+    def fit(self, X, k, **kwargs):
+        return self.sweep(X, [k], **kwargs)[k]
+
+    def inertias(self, X, ks, **kwargs):
+        models = self.sweep(X, ks, **kwargs)
+        return [models[k].inertia_ for k in sorted(set(ks))]
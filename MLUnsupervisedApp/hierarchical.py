@@ -0,0 +1,173 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+import scipy.sparse as sp
+
+from elbow import array_fingerprint
+
+# Exact Ward keeps an n*(n-1)/2 distance matrix in memory (about 400 MB at 10k rows), so larger inputs default to the two-stage mode
+TWO_STAGE_THRESHOLD = 10_000
+
+
+@dataclass
+class Hierarchy:
+    """A Ward tree plus what is needed to map its leaves back to the original rows.
+
+    In the exact mode every row is a leaf and `leaf_of_row` is None. In the two-stage mode
+    the leaves are micro-clusters, `leaf_of_row` assigns each row to one, and `leaf_weights`
+    holds how many rows each micro-cluster stands for.
+    """
+
+    linkage_matrix: np.ndarray
+    leaf_of_row: np.ndarray = None
+    leaf_weights: np.ndarray = None
+
+    @property
+    def two_stage(self):
+        return self.leaf_of_row is not None
+
+    def labels(self, k):
+        """Zero-based labels for the k-cluster cut of the tree, one per original row.
+
+        The cut replays the first m - k merges instead of cutting at a height: one-hot and other
+        discrete features give tied merge heights, and no height then separates exactly k clusters.
+        """
+        m = len(self.linkage_matrix) + 1
+        if not 1 <= k <= m:
+            raise ValueError(f"Cannot cut a tree with {m} leaves into {k} clusters")
+        parent = np.arange(2 * m - 1)
+        merged = self.linkage_matrix[:m - k, :2].astype(int)
+        parent[merged[:, 0]] = parent[merged[:, 1]] = np.arange(m, 2 * m - k)
+        # Pointer jumping: every node ends up pointing at the root of its cluster
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+        leaf_labels = np.unique(parent[:m], return_inverse=True)[1]
+        return leaf_labels if self.leaf_of_row is None else leaf_labels[self.leaf_of_row]
+
+    def dendrogram_kwargs(self, p=20):
+        """Keyword arguments for scipy's dendrogram(), truncated to the last `p` merges.
+
+        In the two-stage mode, truncated leaves are labelled with the number of rows under
+        them rather than the number of micro-clusters.
+        """
+        kwargs = {"Z": self.linkage_matrix, "truncate_mode": "lastp", "p": p}
+        if self.two_stage:
+            m = len(self.leaf_weights)
+            rows_under = np.concatenate([self.leaf_weights, np.zeros(m - 1)])
+            for step, (a, b) in enumerate(self.linkage_matrix[:, :2].astype(int)):
+                rows_under[m + step] = rows_under[a] + rows_under[b]
+            kwargs["leaf_label_func"] = lambda node: f"({int(rows_under[node]):,})"
+        return kwargs
+
+
+def weighted_ward(centers, weights):
+    """Ward linkage of weighted points (micro-cluster centroids), in scipy's linkage format.
+
+    Uses the nearest-neighbour chain algorithm with the closed-form Ward distance between
+    clusters, sqrt(2 * na * nb / (na + nb)) * ||ca - cb||, so each merge accounts for how
+    many rows every micro-cluster stands for.
+    """
+    m = len(centers)
+    centroids = np.array(centers, dtype=np.float64)
+    sizes = np.array(weights, dtype=np.float64)
+    active = np.ones(m, dtype=bool)
+    merges = []
+    chain = []
+
+    def distances_from(i):
+        d = np.sqrt(2 * sizes[i] * sizes / (sizes[i] + sizes)) * np.linalg.norm(centroids - centroids[i], axis=1)
+        d[~active] = np.inf
+        d[i] = np.inf
+        return d
+
+    while len(merges) < m - 1:
+        if not chain:
+            chain.append(int(np.flatnonzero(active)[0]))
+        a = chain[-1]
+        d = distances_from(a)
+        b = int(np.argmin(d))
+        # Prefer the previous chain element on ties so the chain always terminates
+        if len(chain) > 1 and d[chain[-2]] <= d[b]:
+            b = chain[-2]
+        if len(chain) > 1 and b == chain[-2]:
+            chain.pop()
+            chain.pop()
+            merged_size = sizes[a] + sizes[b]
+            merges.append((a, b, d[b], merged_size))
+            # The merged cluster takes over slot a; slot b is retired
+            centroids[a] = (sizes[a] * centroids[a] + sizes[b] * centroids[b]) / merged_size
+            sizes[a] = merged_size
+            active[b] = False
+        else:
+            chain.append(b)
+
+    # nn-chain finds merges out of height order; sort them and relabel clusters the way scipy expects
+    merges.sort(key=lambda merge: merge[2])
+    parent = np.arange(m)
+    cluster_id = np.arange(m)
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    Z = np.empty((m - 1, 4))
+    leaf_counts = np.ones(2 * m - 1)
+    for step, (a, b, height, _) in enumerate(merges):
+        ra, rb = find(a), find(b)
+        ids = sorted((cluster_id[ra], cluster_id[rb]))
+        leaf_counts[m + step] = leaf_counts[ids[0]] + leaf_counts[ids[1]]
+        Z[step] = ids[0], ids[1], height, leaf_counts[m + step]
+        parent[rb] = ra
+        cluster_id[ra] = m + step
+    return Z
+
+
+def build_hierarchy(X, two_stage=False, n_micro_clusters=1_000, random_state=42):
+    """Build the Ward tree once; labels for any k and the dendrogram are both read from it."""
+    from scipy.cluster.hierarchy import linkage
+    from sklearn.cluster import MiniBatchKMeans
+
+    if not two_stage or X.shape[0] <= n_micro_clusters:
+        return Hierarchy(linkage(X.toarray() if sp.issparse(X) else X, "ward"))
+
+    micro = MiniBatchKMeans(n_clusters=n_micro_clusters, random_state=random_state, batch_size=4096, n_init="auto").fit(X)
+    leaf_of_row = micro.labels_
+    weights = np.bincount(leaf_of_row, minlength=n_micro_clusters)
+    # Empty micro-clusters would be zero-weight leaves; drop them and renumber the rest
+    kept = np.flatnonzero(weights)
+    renumber = np.full(n_micro_clusters, -1)
+    renumber[kept] = np.arange(len(kept))
+    return Hierarchy(weighted_ward(micro.cluster_centers_[kept], weights[kept]), renumber[leaf_of_row], weights[kept])
+
+
+class HierarchyEngine:
+    """Memoizes one Ward tree per (data fingerprint, mode), so changing k only re-cuts the tree."""
+
+    def __init__(self, max_datasets=4, n_micro_clusters=1_000):
+        self.max_datasets = max_datasets
+        self.n_micro_clusters = n_micro_clusters
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    def hierarchy(self, X, two_stage=False, fingerprint=None):
+        key = (fingerprint or array_fingerprint(X), bool(two_stage))
+        with self._lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                return self._memo[key]
+
+        tree = build_hierarchy(X, two_stage=two_stage, n_micro_clusters=self.n_micro_clusters)
+        with self._lock:
+            self.builds += 1
+            self._memo[key] = tree
+            while len(self._memo) > self.max_datasets:
+                self._memo.popitem(last=False)
+        return tree
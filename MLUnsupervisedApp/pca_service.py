@@ -0,0 +1,102 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import scipy.sparse as sp
+
+from elbow import array_fingerprint
+
+# Most components any view in the app asks for (the PCA slider tops out at 5, the scatter plots use 2)
+MAX_COMPONENTS = 5
+# Above this many rows the decomposition is fitted batch by batch with IncrementalPCA
+INCREMENTAL_THRESHOLD = 500_000
+# Above this many cells the dense solver switches from the exact SVD to the randomized one
+RANDOMIZED_THRESHOLD = 1_000_000
+# Sparse input up to this many columns is decomposed through its (columns x columns) covariance matrix
+COVARIANCE_MAX_FEATURES = 2_000
+
+
+class Decomposition:
+    """A PCA fitted once with the most components needed; smaller requests are slices of it.
+
+    Components are ordered by explained variance, so the first n components, their variance
+    ratios and the first n projection columns are the same as a PCA fitted with n components.
+    """
+
+    def __init__(self, estimator, X):
+        self.estimator = estimator
+        self._X = X
+        self._projection = None
+        self._lock = threading.Lock()
+
+    @property
+    def n_components(self):
+        return self.estimator.n_components_
+
+    def explained_variance_ratio(self, n):
+        return self.estimator.explained_variance_ratio_[:n]
+
+    def projection(self, n):
+        """First n principal-component scores for every row (computed once, then sliced)."""
+        if n > self.n_components:
+            # Every view asks for at most as many components as the data has columns, so this is a fitting bug
+            raise ValueError(f"{n} components requested, but the decomposition only has {self.n_components}")
+        with self._lock:
+            if self._projection is None:
+                self._projection = self.estimator.transform(self._X).astype(np.float32, copy=False)
+                # The data is only needed for this one transform
+                self._X = None
+        return self._projection[:, :n]
+
+
+def fit_decomposition(X, max_components=MAX_COMPONENTS, random_state=42, batch_size=50_000):
+    from sklearn.decomposition import PCA, IncrementalPCA
+    from sklearn.utils import gen_batches
+
+    n_rows, n_cols = X.shape
+    if sp.issparse(X) and n_cols <= COVARIANCE_MAX_FEATURES:
+        # The covariance solver centers sparse input implicitly and, unlike ARPACK, can return every component, so a
+        # matrix with only two (one-hot) columns still gets the two the scatter plots need
+        n_components = min(max_components, n_rows, n_cols)
+        estimator = PCA(n_components=n_components, svd_solver="covariance_eigh").fit(X)
+    elif sp.issparse(X):
+        # Too many columns for a dense covariance matrix. ARPACK needs strictly fewer components than min(n_rows,
+        # n_cols), which with this many columns is never fewer than the views ask for
+        n_components = min(max_components, min(n_rows, n_cols) - 1)
+        estimator = PCA(n_components=n_components, svd_solver="arpack", random_state=random_state).fit(X)
+    elif n_rows > INCREMENTAL_THRESHOLD:
+        n_components = min(max_components, n_cols)
+        estimator = IncrementalPCA(n_components=n_components, batch_size=max(batch_size, n_components))
+        for batch in gen_batches(n_rows, batch_size, min_batch_size=n_components):
+            estimator.partial_fit(X[batch])
+    else:
+        n_components = min(max_components, n_rows, n_cols)
+        solver = "randomized" if n_rows * n_cols > RANDOMIZED_THRESHOLD else "full"
+        estimator = PCA(n_components=n_components, svd_solver=solver, random_state=random_state).fit(X)
+    return Decomposition(estimator, X)
+
+
+class PCAService:
+    """Memoizes one Decomposition per data fingerprint."""
+
+    def __init__(self, max_datasets=4, max_components=MAX_COMPONENTS):
+        self.max_datasets = max_datasets
+        self.max_components = max_components
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+        self.fits = 0
+
+    def decomposition(self, X, fingerprint=None):
+        key = fingerprint or array_fingerprint(X)
+        with self._lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                return self._memo[key]
+
+        decomposition = fit_decomposition(X, max_components=self.max_components)
+        with self._lock:
+            self.fits += 1
+            self._memo[key] = decomposition
+            while len(self._memo) > self.max_datasets:
+                self._memo.popitem(last=False)
+        return decomposition
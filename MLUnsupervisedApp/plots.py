@@ -0,0 +1,51 @@
+import numpy as np
+
+# matplotlib and seaborn are imported when a figure is drawn, so the app's first render doesn't pay for them
+
+# Above this many points the cluster scatter plots are drawn as a binned density image
+SCATTER_POINT_LIMIT = 50_000
+# Pixels per side of the density image
+DENSITY_GRID_SIZE = 400
+
+
+def density_image(x, y, labels, colors, grid_size=DENSITY_GRID_SIZE):
+    """Bin points into an RGBA image: each pixel takes the colour of its most common cluster
+    and an opacity that grows with the log of how many points fall in it."""
+    # A constant coordinate still needs a non-empty range to bin into
+    x_edges = np.linspace(x.min(), max(x.max(), x.min() + 1e-9), grid_size + 1)
+    y_edges = np.linspace(y.min(), max(y.max(), y.min() + 1e-9), grid_size + 1)
+    xi = np.clip(np.searchsorted(x_edges, x, side="right") - 1, 0, grid_size - 1)
+    yi = np.clip(np.searchsorted(y_edges, y, side="right") - 1, 0, grid_size - 1)
+
+    n_clusters = len(colors)
+    # One bincount over (cluster, row, column) gives every cluster's 2-D histogram at once
+    counts = np.bincount((labels * grid_size + yi) * grid_size + xi, minlength=n_clusters * grid_size * grid_size)
+    counts = counts.reshape(n_clusters, grid_size, grid_size)
+    total = counts.sum(axis=0)
+    dominant = counts.argmax(axis=0)
+
+    image = np.zeros((grid_size, grid_size, 4))
+    image[..., :3] = np.asarray(colors)[dominant]
+    image[..., 3] = np.log1p(total) / np.log1p(total.max())
+    return image, (x_edges[0], x_edges[-1], y_edges[0], y_edges[-1])
+
+
+def cluster_scatter_figure(df_vis, palette, title):
+    """PCA scatter coloured by cluster; large inputs are drawn as a density image instead of one marker per point."""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    from matplotlib.patches import Patch
+
+    fig, ax = plt.subplots(figsize=(13, 5))
+    if len(df_vis) <= SCATTER_POINT_LIMIT:
+        sns.scatterplot(data=df_vis, x="PC1", y="PC2", hue="Cluster", palette=palette, ax=ax)
+    else:
+        clusters, labels = np.unique(df_vis["Cluster"].to_numpy(), return_inverse=True)
+        colors = sns.color_palette(palette, len(clusters))
+        image, extent = density_image(df_vis["PC1"].to_numpy(), df_vis["PC2"].to_numpy(), labels, colors)
+        ax.imshow(image, extent=extent, origin="lower", aspect="auto", interpolation="nearest")
+        ax.set_xlabel("PC1")
+        ax.set_ylabel("PC2")
+        ax.legend(handles=[Patch(color=c, label=str(cl)) for cl, c in zip(clusters, colors)], title="Cluster")
+    ax.set_title(title)
+    return fig
@@ -0,0 +1,118 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+# The encoded matrix is kept sparse when one-hot columns make up more than this share of the columns...
+SPARSE_DUMMY_SHARE = 0.5
+# ...and fewer than this share of its cells are non-zero
+SPARSE_MAX_DENSITY = 0.25
+
+
+@dataclass
+class Preprocessed:
+    """Encoded and standardized feature matrix shared by all three model branches.
+
+    `matrix` is float32 and shared between reruns and sessions, so it must not be modified.
+    It is dense (and flagged read-only) unless one-hot columns dominate, in which case it is
+    a CSR matrix that is scaled but not centered, since centering would make it dense.
+    Distances, and therefore KMeans, silhouette and Ward, don't change under that shift, and
+    PCA centers its input itself. sklearn's sparse kernels reject read-only buffers, so the
+    CSR variant is left writable.
+
+    `mean` and `scale` are the per-column statistics the matrix was standardized with, as in
+    StandardScaler (`mean` is None for the uncentered sparse variant).
+    """
+
+    matrix: object
+    mean: object
+    scale: object
+    columns: list
+    fingerprint: str
+
+    @property
+    def sparse(self):
+        return sp.issparse(self.matrix)
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    @property
+    def empty(self):
+        return self.matrix.shape[0] == 0 or self.matrix.shape[1] == 0
+
+    def dense(self):
+        return self.matrix.toarray() if self.sparse else self.matrix
+
+
+def frame_fingerprint(df):
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    digest.update(repr(list(df.columns)).encode())
+    return digest.hexdigest()
+
+
+def _scale(var, mean, n_rows):
+    """Standard deviations, with (near-)constant columns scaled by 1 the way StandardScaler does it."""
+    eps = np.finfo(np.float64).eps
+    constant = var <= n_rows * eps * var + (n_rows * mean * eps) ** 2
+    return np.where(constant, 1.0, np.sqrt(var))
+
+
+def preprocess(df, features, data_key=None):
+    """One-hot encode, drop incomplete rows and standardize the selected features."""
+    X = pd.get_dummies(df[features], drop_first=True).dropna()
+    columns = list(X.columns)
+    dummy_columns = [col for col in columns if col not in df.columns]
+    fingerprint = hashlib.blake2b(f"{data_key or frame_fingerprint(df)}|{features}".encode(), digest_size=16).hexdigest()
+
+    if X.empty:
+        return Preprocessed(matrix=np.empty(X.shape, dtype=np.float32), mean=None, scale=None, columns=columns, fingerprint=fingerprint)
+
+    density = float((X != 0).to_numpy().mean())
+    if columns and len(dummy_columns) / len(columns) > SPARSE_DUMMY_SHARE and density < SPARSE_MAX_DENSITY:
+        # Converting column by column to a sparse dtype avoids ever materializing the dense float matrix
+        values = X.astype(pd.SparseDtype(np.float32, 0)).sparse.to_coo().tocsr()
+        # Standardized with NumPy/SciPy rather than StandardScaler, so the first render never has to import scikit-learn
+        col_mean = np.asarray(values.mean(axis=0, dtype=np.float64)).ravel()
+        col_var = np.asarray(values.multiply(values).mean(axis=0, dtype=np.float64)).ravel() - col_mean ** 2
+        mean, scale = None, _scale(np.maximum(col_var, 0), col_mean, values.shape[0])
+        matrix = (values @ sp.diags(1 / scale)).astype(np.float32).tocsr()
+    else:
+        values = X.to_numpy(dtype=np.float32)
+        mean = values.mean(axis=0, dtype=np.float64)
+        scale = _scale(values.var(axis=0, dtype=np.float64), mean, values.shape[0])
+        matrix = ((values - mean) / scale).astype(np.float32)
+        matrix.setflags(write=False)
+    return Preprocessed(matrix=matrix, mean=mean, scale=scale, columns=columns, fingerprint=fingerprint)
+
+
+class PreprocessingCache:
+    """LRU cache of Preprocessed results keyed on the data and the selected features, with hit/miss counters."""
+
+    def __init__(self, max_entries=8):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, df, features, data_key=None):
+        key = (data_key or frame_fingerprint(df), tuple(features))
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        result = preprocess(df, features, data_key=key[0])
+        with self._lock:
+            self._entries[key] = result
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
@@ -0,0 +1,86 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+# Datasets up to this many rows get the exact score by default
+EXACT_THRESHOLD = 10_000
+
+
+@dataclass
+class SilhouetteEstimate:
+    score: float
+    ci_low: float
+    ci_high: float
+    sample_size: int
+    n_rows: int
+    exact: bool
+
+    def summary(self):
+        if self.exact:
+            return f"{self.score:.3f} (exact, {self.n_rows:,} rows)"
+        return f"{self.score:.3f} (95% CI {self.ci_low:.3f} to {self.ci_high:.3f}, sample of {self.sample_size:,} of {self.n_rows:,} rows)"
+
+
+def _stratified_sample(labels, counts, sample_size, rng):
+    """Sample row ids so every cluster is represented in proportion to its size, with at least 2 rows each when possible."""
+    quotas = np.round(counts * sample_size / len(labels)).astype(int)
+    quotas = np.minimum(np.maximum(quotas, 2), counts)
+    return np.sort(np.concatenate([
+        rng.choice(np.flatnonzero(labels == cluster), size=quota, replace=False)
+        for cluster, quota in enumerate(quotas)
+    ]))
+
+
+def silhouette(X, labels, sample_size=2_000, exact=None, random_state=42, working_memory=64):
+    """Silhouette score, exact or estimated from a stratified sample.
+
+    Pairwise distances are computed in blocks of at most `working_memory` MB, so memory stays
+    bounded in both modes. The approximate mode draws a per-cluster stratified sample and
+    scores it like sklearn's `silhouette_score(sample_size=...)`, then reports a 95% confidence
+    interval over the sampled rows' silhouette values.
+    """
+    from sklearn.metrics import pairwise_distances_chunked
+
+    labels = np.asarray(labels)
+    n = len(labels)
+    _, encoded = np.unique(labels, return_inverse=True)
+    n_clusters = int(encoded.max()) + 1
+    if not 2 <= n_clusters <= n - 1:
+        raise ValueError(f"Number of labels is {n_clusters}. Valid values are 2 to n_samples - 1 (inclusive)")
+
+    counts = np.bincount(encoded, minlength=n_clusters)
+    exact = n <= EXACT_THRESHOLD if exact is None else exact
+    if exact or sample_size >= n:
+        rows, exact = None, True
+    else:
+        rows = _stratified_sample(encoded, counts, sample_size, np.random.default_rng(random_state))
+
+    X_rows = X if rows is None else X[rows]
+    row_labels = encoded if rows is None else encoded[rows]
+    row_counts = np.bincount(row_labels, minlength=n_clusters)
+    one_hot = np.zeros((len(row_labels), n_clusters))
+    one_hot[np.arange(len(row_labels)), row_labels] = 1.0
+
+    # Per-cluster distance sums for every row; the one-hot product keeps each block's work in BLAS
+    sums = np.empty((len(row_labels), n_clusters))
+    start = 0
+    for block in pairwise_distances_chunked(X_rows, working_memory=working_memory):
+        sums[start:start + len(block)] = block @ one_hot
+        start += len(block)
+
+    idx = np.arange(len(row_labels))
+    # A row's own distance (0) is in its cluster's sum, so it is left out of the count
+    a = sums[idx, row_labels] / np.maximum(row_counts[row_labels] - 1, 1)
+    means = sums / np.maximum(row_counts, 1)
+    means[idx, row_labels] = np.inf
+    b = means.min(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        s = np.nan_to_num((b - a) / np.maximum(a, b))
+    # Singleton clusters score 0, as in sklearn
+    s[counts[row_labels] == 1] = 0.0
+
+    score = float(s.mean())
+    if exact:
+        return SilhouetteEstimate(score, score, score, n, n, True)
+    margin = 1.96 * float(s.std(ddof=1)) / np.sqrt(len(s))
+    return SilhouetteEstimate(score, score - margin, score + margin, len(s), n, False)
@@ -0,0 +1,111 @@
+"""Materialized department x year cube of R&D spending and percentage of GDP.
+
+The views in the notebook (top-N departments, per-department series, latest-year slice,
+heatmap pivot, per-department averages) are read straight from the cube instead of
+scanning the tidy table once per view. New year columns are folded in incrementally.
+"""
+import numpy as np
+import pandas as pd
+
+from tidy_transform import parse_headers
+
+
+class RDCube:
+    """Spending per department (rows) and year (columns), with each year's GDP alongside."""
+
+    def __init__(self):
+        self.departments = pd.Index([], dtype=object, name="department")
+        self.years = np.array([], dtype=np.int64)
+        self.gdp = np.array([], dtype=np.float64)
+        self.spending = np.empty((0, 0))
+        # Per-department totals, updated for the touched rows on refresh so top-N never rescans the cube
+        self._totals = np.array([], dtype=np.float64)
+        self._ranking = None
+
+    @classmethod
+    def from_wide(cls, df, id_column="department"):
+        return cls().refresh(df, id_column=id_column)
+
+    @classmethod
+    def from_tidy(cls, tidy_df):
+        cube = cls()
+        wide = tidy_df.pivot_table(index="department", columns="year", values="spending", aggfunc="first", dropna=False, sort=False)
+        years = wide.columns.to_numpy(dtype=np.int64)
+        cube._update(wide.index, years, tidy_df.groupby("year")["gdp"].first().loc[years].to_numpy(), wide.to_numpy(dtype=np.float64))
+        return cube
+
+    def refresh(self, df, id_column="department"):
+        """Fold a wide table into the cube.
+
+        New departments and year columns are added, values for cells the table covers are
+        overwritten, and only the touched departments' totals are recomputed.
+        """
+        schema = parse_headers([col for col in df.columns if col != id_column])
+        self._update(pd.Index(df[id_column]), schema.years, schema.gdp, df[list(schema.columns)].to_numpy(dtype=np.float64))
+        return self
+
+    def _update(self, departments, years, gdp, values):
+        added = departments.difference(self.departments, sort=False)
+        if len(added):
+            self.departments = self.departments.append(pd.Index(added, dtype=object, name="department"))
+            self.spending = np.vstack([self.spending, np.full((len(added), len(self.years)), np.nan)])
+            self._totals = np.concatenate([self._totals, np.zeros(len(added))])
+
+        new_years = ~np.isin(years, self.years)
+        if new_years.any():
+            self.years = np.concatenate([self.years, years[new_years]])
+            self.gdp = np.concatenate([self.gdp, gdp[new_years]])
+            self.spending = np.hstack([self.spending, np.full((len(self.departments), int(new_years.sum())), np.nan)])
+            # Keep years sorted so slices and series come out in chronological order
+            order = np.argsort(self.years, kind="stable")
+            self.years, self.gdp, self.spending = self.years[order], self.gdp[order], self.spending[:, order]
+
+        rows = self.departments.get_indexer(departments)
+        cols = np.searchsorted(self.years, years)
+        self.spending[np.ix_(rows, cols)] = values
+        self._totals[rows] = np.nansum(self.spending[rows], axis=1)
+        self._ranking = None
+
+    @property
+    def pct_of_gdp(self):
+        return self.spending / self.gdp * 100
+
+    @property
+    def latest_year(self):
+        return int(self.years[-1])
+
+    def top_departments(self, n=5):
+        """Departments with the largest total spending, like groupby('department')['spending'].sum().nlargest(n)."""
+        if self._ranking is None:
+            self._ranking = np.argsort(-self._totals, kind="stable")
+        return self.departments[self._ranking[:n]]
+
+    def series(self, department, value="pct_of_gdp"):
+        """One department's values by year."""
+        row = self.departments.get_loc(department)
+        values = self.spending[row] if value == "spending" else self.spending[row] / self.gdp * 100
+        return pd.DataFrame({"year": self.years, value: values})
+
+    def year_slice(self, year=None):
+        """Every department's spending and pct_of_gdp for one year (default: the latest), highest pct first."""
+        year = self.latest_year if year is None else year
+        col = int(np.searchsorted(self.years, year))
+        if col == len(self.years) or self.years[col] != year:
+            raise KeyError(year)
+        spending = self.spending[:, col]
+        return pd.DataFrame({
+            "department": self.departments,
+            "spending": spending,
+            "year": year,
+            "gdp": self.gdp[col],
+            "pct_of_gdp": spending / self.gdp[col] * 100,
+        }).sort_values("pct_of_gdp", ascending=False)
+
+    def pivot(self, value="pct_of_gdp"):
+        """Department x year table, like tidy_df.pivot_table(values=value, index='department', columns='year')."""
+        values = self.spending if value == "spending" else self.pct_of_gdp
+        return pd.DataFrame(values, index=self.departments, columns=pd.Index(self.years, name="year")).sort_index()
+
+    def mean_by_department(self, value="pct_of_gdp"):
+        values = self.spending if value == "spending" else self.pct_of_gdp
+        return pd.Series(np.nanmean(values, axis=1), index=self.departments, name=value)
@@ -0,0 +1,90 @@
+"""Reshape wide R&D tables (one column per year, e.g. ``1976_gdp1790000000000.0``) into tidy long tables.
+
+Column headers are parsed once into a typed HeaderSchema, and the long table is built with a
+single NumPy reshape instead of melting and re-parsing the header text on every row.
+"""
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+HEADER_PATTERN = re.compile(r"^(?P<year>\d{4})_gdp(?P<gdp>\d+\.?\d*)$")
+TIDY_COLUMNS = ["department", "spending", "year", "gdp", "pct_of_gdp"]
+
+
+@dataclass(frozen=True)
+class HeaderSchema:
+    """Parsed value-column headers: the original names and their year and GDP, in column order."""
+
+    columns: tuple
+    years: np.ndarray
+    gdp: np.ndarray
+
+    def frame(self):
+        return pd.DataFrame({"year_gdp": self.columns, "year": self.years, "gdp": self.gdp})
+
+
+@lru_cache(maxsize=256)
+def _parse_headers(columns):
+    years, gdp = [], []
+    for column in columns:
+        match = HEADER_PATTERN.match(column)
+        if match is None:
+            raise ValueError(f"Column {column!r} doesn't look like '<year>_gdp<value>'")
+        years.append(int(match["year"]))
+        gdp.append(float(match["gdp"]))
+    return HeaderSchema(columns, np.array(years, dtype=np.int64), np.array(gdp, dtype=np.float64))
+
+
+def parse_headers(columns):
+    """Parse value-column headers into a HeaderSchema.
+
+    Results are cached by header tuple, so a batch of files sharing a layout parses it once.
+    """
+    return _parse_headers(tuple(columns))
+
+
+def wide_to_long(df, schema=None, id_column="department"):
+    """Build the tidy long table from a wide one.
+
+    Rows come out in the same order as ``pd.melt`` (every department for the first year,
+    then the next year, and so on) with the columns department, spending, year, gdp and
+    pct_of_gdp.
+    """
+    if schema is None:
+        schema = parse_headers([col for col in df.columns if col != id_column])
+    values = df[list(schema.columns)].to_numpy(dtype=np.float64)
+    n_ids, n_years = values.shape
+
+    spending = values.T.reshape(-1)
+    gdp = np.repeat(schema.gdp, n_ids)
+    return pd.DataFrame({
+        id_column: np.tile(df[id_column].to_numpy(), n_years),
+        "spending": spending,
+        "year": np.repeat(schema.years, n_ids),
+        "gdp": gdp,
+        "pct_of_gdp": spending / gdp * 100,
+    })
+
+
+def reshape_many(sources, id_column="department", source_column="source", **read_csv_kwargs):
+    """Yield one tidy table per wide source, tagged with where it came from.
+
+    Each source is a CSV path, labelled with the path itself, or a ``(label, data)`` pair where
+    data is a DataFrame or a path. Tables are produced one at a time so a large batch never has
+    to fit in memory at once; ``pd.concat(reshape_many(paths))`` collects them when it does.
+    """
+    for source in sources:
+        if isinstance(source, tuple):
+            label, data = source
+        elif isinstance(source, pd.DataFrame):
+            raise TypeError("pass DataFrames as (label, frame) pairs so their rows can be told apart")
+        else:
+            label, data = str(source), source
+        df = data if isinstance(data, pd.DataFrame) else pd.read_csv(data, **read_csv_kwargs)
+        tidy = wide_to_long(df, id_column=id_column)
+        if source_column:
+            tidy[source_column] = label
+        yield tidy
@@ -0,0 +1,154 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# The three columns the explorer filters on with dropdowns, and the numeric column behind the range slider
+DIMENSIONS = ["Name", "Geo Place Name", "Time Period"]
+VALUE_COLUMN = "Data Value"
+
+# Text columns that repeat a handful of values across the whole export, so they are stored as categoricals to keep the table small
+CATEGORICAL_COLUMNS = DIMENSIONS + ["Measure", "Measure Info", "Geo Type Name", "Start_Date"]
+
+
+class AirQualityStore:
+    """Columnar, indexed copy of the air quality table.
+
+    Every filter dimension keeps a row-id index (rows grouped by category code), and the
+    Data Value column keeps a sorted index, so a combination of filters is answered with
+    an index intersection plus a binary-searched range instead of boolean masks over the
+    full table.
+    """
+
+    def __init__(self, table, index_order, index_offsets, value_order):
+        self.table = table
+        self._codes = {dim: table[dim].cat.codes.to_numpy() for dim in DIMENSIONS}
+        self._categories = {dim: table[dim].cat.categories for dim in DIMENSIONS}
+        self._index_order = index_order
+        self._index_offsets = index_offsets
+        self._values = table[VALUE_COLUMN].to_numpy(dtype="float64")
+        self._value_order = value_order
+        self._sorted_values = self._values[value_order]
+        # NaNs sort to the end, so only the first n_valid positions take part in range lookups
+        self._n_valid = int(np.count_nonzero(~np.isnan(self._values)))
+
+    @classmethod
+    def from_frame(cls, df):
+        table = df.copy()
+        for col in CATEGORICAL_COLUMNS:
+            if col in table.columns:
+                table[col] = table[col].astype("category")
+        table = table.reset_index(drop=True)
+
+        index_order, index_offsets = {}, {}
+        for dim in DIMENSIONS:
+            codes = table[dim].cat.codes.to_numpy()
+            # A stable sort keeps row ids ascending inside every category, which the intersections below rely on
+            order = np.argsort(codes, kind="stable")
+            counts = np.bincount(codes[codes >= 0], minlength=len(table[dim].cat.categories))
+            skipped = int(np.count_nonzero(codes < 0))
+            index_order[dim] = order[skipped:].astype(np.int64)
+            index_offsets[dim] = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+        value_order = np.argsort(table[VALUE_COLUMN].to_numpy(dtype="float64"), kind="stable").astype(np.int64)
+        return cls(table, index_order, index_offsets, value_order)
+
+    @classmethod
+    def load(cls, csv_path):
+        """Build the store from the CSV, reusing the Parquet/index files next to it when they are up to date."""
+        base = os.path.splitext(csv_path)[0]
+        parquet_path, index_path = base + ".parquet", base + ".index.npz"
+        csv_mtime = os.path.getmtime(csv_path)
+
+        if all(os.path.exists(p) and os.path.getmtime(p) >= csv_mtime for p in (parquet_path, index_path)):
+            try:
+                table = pd.read_parquet(parquet_path)
+            except ImportError:
+                # Written by an environment that had a Parquet engine; this one rebuilds from the CSV
+                table = None
+            if table is not None:
+                with np.load(index_path) as saved:
+                    index_order = {dim: saved[f"order_{i}"] for i, dim in enumerate(DIMENSIONS)}
+                    index_offsets = {dim: saved[f"offsets_{i}"] for i, dim in enumerate(DIMENSIONS)}
+                    value_order = saved["value_order"]
+                return cls(table, index_order, index_offsets, value_order)
+
+        df = pd.read_csv(csv_path, dtype={col: "category" for col in CATEGORICAL_COLUMNS})
+        store = cls.from_frame(df)
+        try:
+            store.save(parquet_path, index_path)
+        except (OSError, ImportError):
+            # Read-only deployments, and environments without pyarrow (pandas' Parquet engine is optional), still work: they just rebuild the store in memory on a cold start
+            pass
+        return store
+
+    def save(self, parquet_path, index_path):
+        self.table.to_parquet(parquet_path, index=False)
+        arrays = {"value_order": self._value_order}
+        for i, dim in enumerate(DIMENSIONS):
+            arrays[f"order_{i}"] = self._index_order[dim]
+            arrays[f"offsets_{i}"] = self._index_offsets[dim]
+        np.savez(index_path, **arrays)
+
+    def __len__(self):
+        return len(self.table)
+
+    @property
+    def value_bounds(self):
+        if self._n_valid == 0:
+            return 0.0, 0.0
+        return float(self._sorted_values[0]), float(self._sorted_values[self._n_valid - 1])
+
+    def rows_for(self, dim, value):
+        """Sorted row ids whose `dim` equals `value` (empty if the value is unknown)."""
+        categories = self._categories[dim]
+        if value not in categories:
+            return np.empty(0, dtype=np.int64)
+        code = categories.get_loc(value)
+        offsets = self._index_offsets[dim]
+        return self._index_order[dim][offsets[code]:offsets[code + 1]]
+
+    def filter(self, selections=None, value_range=None):
+        """Return the sorted row ids matching every selection and the optional (low, high) Data Value range.
+
+        `selections` maps a dimension to the selected value; missing dimensions (or None) mean "All".
+        """
+        selections = {dim: v for dim, v in (selections or {}).items() if v is not None}
+        if not selections:
+            if value_range is None:
+                return np.arange(len(self), dtype=np.int64)
+            lo = np.searchsorted(self._sorted_values[:self._n_valid], value_range[0], side="left")
+            hi = np.searchsorted(self._sorted_values[:self._n_valid], value_range[1], side="right")
+            return np.sort(self._value_order[lo:hi])
+
+        # Intersect smallest posting list first so every step works on the fewest rows
+        postings = sorted((self.rows_for(dim, v) for dim, v in selections.items()), key=len)
+        rows = postings[0]
+        for other in postings[1:]:
+            if not len(rows):
+                break
+            rows = np.intersect1d(rows, other, assume_unique=True)
+
+        # Once the candidates are narrowed down, checking their values directly beats intersecting with the range index
+        if value_range is not None and len(rows):
+            values = self._values[rows]
+            rows = rows[(values >= value_range[0]) & (values <= value_range[1])]
+        return rows
+
+    def options(self, dim, rows=None):
+        """Distinct values of `dim` among `rows`, in order of first appearance (like Series.unique())."""
+        codes = self._codes[dim]
+        if rows is None:
+            # The first entry of every posting list is that category's first row, so no scan is needed
+            offsets = self._index_offsets[dim]
+            present = np.flatnonzero(np.diff(offsets))
+            first_rows = self._index_order[dim][offsets[present]]
+            ordered = present[np.argsort(first_rows)]
+        else:
+            subset = codes[rows]
+            ordered, first = np.unique(subset[subset >= 0], return_index=True)
+            ordered = ordered[np.argsort(first)]
+        return list(self._categories[dim][ordered])
+
+    def take(self, rows):
+        return self.table.iloc[rows]
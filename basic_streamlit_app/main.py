@@ -1,46 +1,66 @@
+import os
+import sys
+
+# `streamlit run` only puts this folder on sys.path; the stage profiler is shared with the ML apps from the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
 import streamlit as st
-import pandas as pd
 
-# Load the dataset
-df = pd.read_csv("data/Air_Quality.csv")
-data = df
+from air_quality_store import AirQualityStore
+from shared.profiling import render_panel, session_profiler
+
+# Every stage of this rerun is timed (wall time, CPU time, peak memory) for the profiling panel in the sidebar
+profiler = session_profiler("air-quality")
+
+# Load the dataset once per server process. The store keeps a categorical, columnar copy of the CSV (persisted as Parquet next to it) together with row-id indexes for every filter, so widget changes only intersect indexes instead of re-reading and re-scanning the whole table
+@st.cache_resource
+def load_store(path):
+    return AirQualityStore.load(path)
+
+with profiler.stage("load store"):
+    store = load_store("data/Air_Quality.csv")
 
 # Seting up app's title and description
 st.title("NYC Air Quality Database Explorer")
 st.write("This app allows you to explore NYC Air Quality data with interactive filtering options.")
 
 # Dropdown Name (air quality indicators)
-name = st.selectbox("Select Air Quality Indicator:", options=["All"] + list(data["Name"].unique()))
+name = st.selectbox("Select Air Quality Indicator:", options=["All"] + store.options("Name"))
 
 # Filtering data based on Name selection
-filtered_data = data if name == "All" else data[data["Name"] == name]
+selections = {"Name": None if name == "All" else name}
+rows = store.filter(selections) if name != "All" else None
 
 # Dropdown for locations
-locations = st.selectbox("Select Location:", options=["All"] + list(filtered_data["Geo Place Name"].unique()))
+locations = st.selectbox("Select Location:", options=["All"] + store.options("Geo Place Name", rows))
 
 # Filtering data based on location selection
-filtered_data = filtered_data if locations == "All" else filtered_data[filtered_data["Geo Place Name"] == locations]
+selections["Geo Place Name"] = None if locations == "All" else locations
+rows = store.filter(selections) if locations != "All" else rows
 
 # Filtering time period
-time_periods = sorted(list(filtered_data["Time Period"].unique()))
+time_periods = sorted(store.options("Time Period", rows))
 selected_time_period = st.selectbox("Select Time Period:", options=["All"] + time_periods)
 
 # Filtering data based on time period selection
-filtered_data = filtered_data if selected_time_period == "All" else filtered_data[filtered_data["Time Period"] == selected_time_period]
+selections["Time Period"] = None if selected_time_period == "All" else selected_time_period
 
 # Data Value range slider
-min_value, max_value = float(data["Data Value"].min()), float(data["Data Value"].max())
+min_value, max_value = store.value_bounds
 data_value_range = st.slider(
    "Select Data Value range:",
    min_value=min_value,
    max_value=max_value,
    value=(min_value, max_value)
 )
-filtered_data = filtered_data[
-   (filtered_data["Data Value"] >= data_value_range[0]) &
-   (filtered_data["Data Value"] <= data_value_range[1])
-]
+with profiler.stage("filter"):
+    filtered_data = store.take(store.filter(selections, value_range=data_value_range))
 
 # Displaying filtered data and count
 st.subheader(f"There are {len(filtered_data)} measurements that match your specifications")
-st.dataframe(filtered_data)
\ No newline at end of file
+with profiler.stage("render table"):
+    st.dataframe(filtered_data)
+
+render_panel(st.sidebar, profiler)
@@ -0,0 +1,99 @@
+"""Measure each app's first render in a fresh interpreter and check it against an import-time budget.
+
+The first render is the script run a new visitor triggers on a freshly started server, with
+Streamlit itself already imported. Besides its wall time, the check fails if the first render
+imports a library that only model training or plotting needs.
+
+Example:
+    python benchmarks/cold_start.py
+    python benchmarks/cold_start.py --app unsupervised --repeat 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from suites import APP_DIRS
+
+SCRIPTS = {
+    "air-quality": "main.py",
+    "supervised": "app.py",
+    "unsupervised": "MLUnsupervisedApp.py",
+}
+# Seconds the first render of each app may take, with Streamlit already imported
+BUDGETS = {
+    "air-quality": 1.5,
+    "supervised": 1.5,
+    "unsupervised": 1.5,
+}
+# Libraries the first render must not import: they are only needed once a model is trained or plotted
+DEFERRED_MODULES = ["sklearn", "matplotlib.pyplot", "seaborn", "scipy.cluster"]
+
+
+def first_render(app):
+    import time
+
+    from streamlit.testing.v1 import AppTest
+
+    already_loaded = set(sys.modules)
+    started = time.perf_counter()
+    at = AppTest.from_file(os.path.join(APP_DIRS[app], SCRIPTS[app]), default_timeout=120).run()
+    seconds = time.perf_counter() - started
+    return {
+        "seconds": seconds,
+        "exception": [str(e.value) for e in at.exception],
+        "deferred_imported": [m for m in DEFERRED_MODULES if m in sys.modules and m not in already_loaded],
+    }
+
+
+def measure(app, repeat):
+    runs = []
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", app],
+            cwd=APP_DIRS[app], capture_output=True, text=True, env=dict(os.environ, MPLBACKEND="Agg"),
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"First render of {app} failed:\n{completed.stderr}")
+        runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    return {
+        "app": app,
+        "median_s": statistics.median(run["seconds"] for run in runs),
+        "budget_s": BUDGETS[app],
+        "exception": runs[-1]["exception"],
+        "deferred_imported": runs[-1]["deferred_imported"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", nargs="+", choices=SCRIPTS, default=list(SCRIPTS), help="apps to check")
+    parser.add_argument("--repeat", type=int, default=3, help="fresh interpreters per app; the median is reported")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        import streamlit  # noqa: F401  (the server has it loaded before any script runs)
+
+        print("\n" + json.dumps(first_render(args.child)))
+        return 0
+
+    failed = False
+    for app in args.app:
+        result = measure(app, args.repeat)
+        problems = []
+        if result["median_s"] > result["budget_s"]:
+            problems.append(f"over the {result['budget_s']}s budget")
+        if result["deferred_imported"]:
+            problems.append(f"imports {', '.join(result['deferred_imported'])}")
+        if result["exception"]:
+            problems.append(f"raised {result['exception']}")
+        failed = failed or bool(problems)
+        print(f"{app:13} first render {result['median_s']:.2f}s  {'; '.join(problems) or 'ok'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
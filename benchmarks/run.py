@@ -0,0 +1,203 @@
+"""Benchmark the three apps' pipelines on synthetic data and compare against a stored baseline.
+
+Each (suite, size) runs in its own subprocess, so peak memory is measured in isolation and the
+apps' same-named modules never meet in one interpreter. Every case reports latency
+percentiles over its repetitions, throughput at the median latency, and the peak memory
+allocated by one extra traced repetition.
+
+Example:
+    python benchmarks/run.py --suite unsupervised --rows 1e3 1e4 1e5 --output results.json
+    python benchmarks/run.py --rows 1e6 1e7 --repeat 1 --baseline benchmarks/baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(HERE, "baseline.json")
+DEFAULT_ROWS = [1_000, 10_000, 100_000]
+# A case regresses when its median latency or peak memory grows by more than this share of the baseline...
+DEFAULT_TOLERANCE = 0.3
+# ...and by more than these absolute amounts, so sub-millisecond noise never fails a run
+MIN_LATENCY_CHANGE = 0.005
+MIN_MEMORY_CHANGE_MB = 1.0
+
+
+def environment():
+    import pandas as pd
+    import sklearn
+
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "scikit-learn": sklearn.__version__,
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def measure(case, repeat):
+    # One untimed run first, so imports deferred to first use and other one-off warm-up costs aren't counted
+    case.run(case.setup() if case.setup else None)
+
+    latencies = []
+    for _ in range(case.repeat or repeat):
+        state = case.setup() if case.setup else None
+        started = time.perf_counter()
+        case.run(state)
+        latencies.append(time.perf_counter() - started)
+
+    # Tracing slows allocations down, so memory comes from a separate repetition that isn't timed
+    state = case.setup() if case.setup else None
+    tracemalloc.start()
+    try:
+        case.run(state)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    latencies = np.array(latencies)
+    p50 = float(np.percentile(latencies, 50))
+    return {
+        "case": case.name,
+        "repeat": len(latencies),
+        "p50_s": p50,
+        "p90_s": float(np.percentile(latencies, 90)),
+        "p99_s": float(np.percentile(latencies, 99)),
+        "mean_s": float(latencies.mean()),
+        "throughput": case.items / p50 if p50 > 0 else None,
+        "unit": f"{case.unit}/s",
+        "peak_mb": peak / 2**20,
+    }
+
+
+def run_child(suite, n_rows, repeat, seed):
+    """Run one suite at one size in this process and return its records."""
+    import suites
+
+    suites.use_app(suite)
+    with tempfile.TemporaryDirectory() as workdir:
+        started = time.perf_counter()
+        cases = suites.SUITES[suite](n_rows, seed, workdir)
+        generate_s = time.perf_counter() - started
+        records = [measure(case, repeat) for case in cases]
+    max_rss_mb = None
+    if resource is not None:
+        # Linux reports kilobytes, macOS bytes
+        max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (2**20 if sys.platform == "darwin" else 2**10)
+    for record in records:
+        record.update(suite=suite, rows=n_rows, generate_s=generate_s, process_max_rss_mb=max_rss_mb)
+    return records
+
+
+def run_suites(suite_names, rows, repeat, seed):
+    records = []
+    for suite in suite_names:
+        for n_rows in rows:
+            print(f"{suite} @ {n_rows:,} rows ...", file=sys.stderr, flush=True)
+            command = [sys.executable, os.path.abspath(__file__), "--child", suite, str(n_rows),
+                       "--repeat", str(repeat), "--seed", str(seed)]
+            env = dict(os.environ, MPLBACKEND="Agg")
+            completed = subprocess.run(command, capture_output=True, text=True, env=env)
+            if completed.returncode != 0:
+                raise RuntimeError(f"{suite} @ {n_rows} rows failed:\n{completed.stderr}")
+            records += json.loads(completed.stdout.strip().splitlines()[-1])
+    return records
+
+
+def compare(records, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Pair every record with its baseline entry and flag latency or memory regressions."""
+    previous = {(r["suite"], r["case"], r["rows"]): r for r in baseline["results"]}
+    rows = []
+    for record in records:
+        before = previous.get((record["suite"], record["case"], record["rows"]))
+        if before is None:
+            continue
+        latency_ratio = record["p50_s"] / before["p50_s"] if before["p50_s"] else float("inf")
+        memory_ratio = record["peak_mb"] / before["peak_mb"] if before["peak_mb"] else float("inf")
+        slower = latency_ratio > 1 + tolerance and record["p50_s"] - before["p50_s"] > MIN_LATENCY_CHANGE
+        bigger = memory_ratio > 1 + tolerance and record["peak_mb"] - before["peak_mb"] > MIN_MEMORY_CHANGE_MB
+        rows.append({
+            "suite": record["suite"],
+            "case": record["case"],
+            "rows": record["rows"],
+            "latency_ratio": latency_ratio,
+            "memory_ratio": memory_ratio,
+            "regressed": slower or bigger,
+        })
+    return rows
+
+
+def print_table(records, comparison=None):
+    import pandas as pd
+
+    table = pd.DataFrame(records)[["suite", "rows", "case", "p50_s", "p90_s", "p99_s", "throughput", "unit", "peak_mb"]]
+    if comparison:
+        table = table.merge(pd.DataFrame(comparison), on=["suite", "case", "rows"], how="left")
+    with pd.option_context("display.max_rows", None, "display.width", 200, "display.float_format", "{:.4g}".format):
+        print(table.to_string(index=False))
+
+
+def main(argv=None):
+    import suites
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--suite", nargs="+", choices=suites.SUITES, default=list(suites.SUITES), help="suites to run")
+    parser.add_argument("--rows", nargs="+", type=float, default=DEFAULT_ROWS, help="dataset sizes, e.g. 1e3 1e5 1e7")
+    parser.add_argument("--repeat", type=int, default=5, help="timed repetitions per case")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the synthetic data")
+    parser.add_argument("--output", help="write the results (with the environment) to this JSON file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="overwrite the baseline with these results")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed slowdown/memory growth, as a share")
+    parser.add_argument("--child", nargs=2, metavar=("SUITE", "ROWS"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        suite, n_rows = args.child
+        # On a line of its own, in case a library prints to stdout as well
+        print("\n" + json.dumps(run_child(suite, int(n_rows), args.repeat, args.seed)))
+        return 0
+
+    records = run_suites(args.suite, [int(n) for n in args.rows], args.repeat, args.seed)
+    report = {"environment": environment(), "results": records}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    comparison = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["environment"] != report["environment"]:
+            print("Note: the baseline was recorded in a different environment, so ratios are only indicative", file=sys.stderr)
+        comparison = compare(records, baseline, args.tolerance)
+    print_table(records, comparison)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.baseline}", file=sys.stderr)
+    elif comparison and any(row["regressed"] for row in comparison):
+        print("Regressions against the baseline found", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
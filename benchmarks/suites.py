@@ -0,0 +1,161 @@
+"""Benchmark cases for each app, driving the same code paths as a rerun without Streamlit.
+
+A suite function builds its synthetic input once and returns a list of Cases. Every case is
+timed `repeat` times; its optional `setup` runs before each repetition, untimed, so memoizing
+engines can be recreated and each repetition measures a cold computation.
+"""
+import os
+import sys
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import numpy as np
+
+import synthetic
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIRS = {
+    "air-quality": os.path.join(ROOT, "basic_streamlit_app"),
+    "supervised": os.path.join(ROOT, "MLStreamlitApp"),
+    "unsupervised": os.path.join(ROOT, "MLUnsupervisedApp"),
+}
+
+
+@dataclass
+class Case:
+    name: str
+    run: Callable
+    setup: Optional[Callable] = None
+    # What one repetition processes, for the throughput column
+    items: int = 1
+    unit: str = "rows"
+    # Overrides the harness's repeat count (e.g. many short filter queries)
+    repeat: Optional[int] = None
+
+
+def use_app(suite):
+    """Make an app's modules and the shared/ package importable.
+
+    Apps still have same-named modules of their own (plots, for one), so only one suite runs per process.
+    """
+    sys.path.insert(0, APP_DIRS[suite])
+    if ROOT not in sys.path:
+        sys.path.append(ROOT)
+
+
+def air_quality_cases(n_rows, seed, workdir):
+    from air_quality_store import DIMENSIONS, AirQualityStore
+
+    csv_path = os.path.join(workdir, "Air_Quality.csv")
+    synthetic.air_quality(n_rows, seed).to_csv(csv_path, index=False)
+    cache_files = [os.path.splitext(csv_path)[0] + suffix for suffix in (".parquet", ".index.npz")]
+
+    def drop_cache_files():
+        for path in cache_files:
+            if os.path.exists(path):
+                os.remove(path)
+
+    store = AirQualityStore.load(csv_path)
+    rng = np.random.default_rng(seed)
+    lo, hi = store.value_bounds
+
+    def random_query():
+        selections = {}
+        for dim in DIMENSIONS:
+            # Each dropdown is left on "All" half of the time
+            options = store.options(dim)
+            selections[dim] = options[rng.integers(len(options))] if rng.random() < 0.5 else None
+        value_range = tuple(sorted(rng.uniform(lo, hi, size=2)))
+        return selections, value_range
+
+    def rerun(query):
+        # One rerun of main.py: the cascading dropdown options, then the filtered table
+        selections, value_range = query
+        rows = None
+        for dim in DIMENSIONS[:-1]:
+            rows = store.filter({d: selections[d] for d in DIMENSIONS[:DIMENSIONS.index(dim) + 1]})
+            store.options(DIMENSIONS[DIMENSIONS.index(dim) + 1], rows)
+        return store.take(store.filter(selections, value_range=value_range))
+
+    return [
+        Case("load csv (cold)", lambda _: AirQualityStore.load(csv_path), setup=drop_cache_files, items=n_rows),
+        Case("load parquet (warm)", lambda _: AirQualityStore.load(csv_path), setup=lambda: store.save(*cache_files), items=n_rows),
+        Case("filter rerun", rerun, setup=random_query, unit="queries", repeat=200),
+    ]
+
+
+def supervised_cases(n_rows, seed, workdir):
+    from ingest import read_csv_chunked
+    from plots import histogram_kde_figure
+    from shared.figures import render_png
+    from training import train_and_evaluate
+
+    csv_path = os.path.join(workdir, "supervised.csv")
+    synthetic.supervised(n_rows, seed).to_csv(csv_path, index=False)
+    df = read_csv_chunked(csv_path, track_memory=False).frame
+    X, y = df.drop(columns="species"), df["species"]
+    feature = X.columns[0]
+
+    return [
+        Case("ingest csv", lambda _: read_csv_chunked(csv_path, track_memory=False), items=n_rows),
+        Case("train decision tree", lambda _: train_and_evaluate(X, y, "Decision Tree", {"max_depth": 5}, 0.2), items=n_rows),
+        Case("train logistic regression", lambda _: train_and_evaluate(X, y, "Logistic Regression", {"max_iter": 100}, 0.2), items=n_rows),
+        Case("histogram + kde", lambda _: render_png(histogram_kde_figure(df[feature], feature)), items=n_rows),
+    ]
+
+
+def unsupervised_cases(n_rows, seed, workdir):
+    import pandas as pd
+
+    from elbow import MINIBATCH_THRESHOLD, ElbowEngine
+    from hierarchical import TWO_STAGE_THRESHOLD, build_hierarchy
+    from pca_service import fit_decomposition
+    from plots import cluster_scatter_figure
+    from shared.figures import render_png
+    from preprocessing import preprocess
+    from silhouette import silhouette
+
+    df = synthetic.unsupervised(n_rows, seed)
+    features = list(df.columns)
+    prepared = preprocess(df, features, data_key=f"synthetic-{n_rows}-{seed}")
+    X = prepared.matrix
+    # Same defaults the app picks for a dataset of this size
+    minibatch = n_rows >= MINIBATCH_THRESHOLD
+    two_stage = n_rows > TWO_STAGE_THRESHOLD
+    labels = ElbowEngine().fit(X, 3, fingerprint=prepared.fingerprint, minibatch=minibatch).predict(X)
+    df_vis = pd.DataFrame(fit_decomposition(X).projection(2), columns=["PC1", "PC2"])
+    df_vis["Cluster"] = labels
+
+    def kmeans(engine):
+        return engine.fit(X, 3, fingerprint=prepared.fingerprint, minibatch=minibatch).predict(X)
+
+    def elbow(engine):
+        return engine.inertias(X, range(2, 7), fingerprint=prepared.fingerprint, minibatch=minibatch)
+
+    def hierarchical(_):
+        return build_hierarchy(X, two_stage=two_stage).labels(3)
+
+    # Discrete features tie merge heights, and the k-cluster cut once came back with fewer than k clusters on them
+    tied = pd.DataFrame({"level": np.tile(list("ABCD"), 50), "flag": np.repeat([0, 1], 100)})
+    tied_tree = build_hierarchy(preprocess(tied, list(tied.columns)).matrix)
+    for k in range(1, 9):
+        found = len(np.unique(tied_tree.labels(k)))
+        if found != k:
+            raise AssertionError(f"cutting a tree with tied merge heights into {k} clusters gave {found}")
+
+    return [
+        Case("encode + scale", lambda _: preprocess(df, features), items=n_rows),
+        Case("kmeans fit", kmeans, setup=ElbowEngine, items=n_rows),
+        Case("elbow sweep k=2..6", elbow, setup=ElbowEngine, items=n_rows),
+        Case("silhouette", lambda _: silhouette(X, labels), items=n_rows),
+        Case("hierarchical", hierarchical, items=n_rows),
+        Case("pca", lambda _: fit_decomposition(X).projection(2), items=n_rows),
+        Case("cluster scatter", lambda _: render_png(cluster_scatter_figure(df_vis, "Set2", "Clusters (PCA)")), items=n_rows),
+    ]
+
+
+SUITES = {
+    "air-quality": air_quality_cases,
+    "supervised": supervised_cases,
+    "unsupervised": unsupervised_cases,
+}
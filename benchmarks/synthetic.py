@@ -0,0 +1,80 @@
+"""Synthetic datasets with the same schemas as the apps' data, at any number of rows.
+
+Every generator is deterministic for a given (n_rows, seed), so benchmark runs on the same
+machine are comparable with each other and with the stored baseline.
+"""
+import numpy as np
+import pandas as pd
+
+# (Name, Measure Info, Indicator ID, median Data Value), matching the indicators in Air_Quality.csv
+AIR_QUALITY_INDICATORS = [
+    ("Fine particles (PM 2.5)", "mcg/m3", 365, 7.0),
+    ("Nitrogen dioxide (NO2)", "ppb", 375, 18.0),
+    ("Ozone (O3)", "ppb", 386, 30.0),
+]
+AIR_QUALITY_PERIODS = [
+    ("Annual Average 2020", "1/01/20"),
+    ("Summer 2020", "6/01/20"),
+    ("Winter 2020-21", "12/01/20"),
+    ("Annual Average 2021", "1/01/21"),
+    ("Summer 2021", "6/01/21"),
+    ("Winter 2021-22", "12/01/21"),
+    ("Annual Average 2022", "1/01/22"),
+    ("Summer 2022", "6/01/22"),
+]
+AIR_QUALITY_GEO_TYPES = ["Citywide", "Borough", "UHF34", "UHF42", "CD"]
+AIR_QUALITY_PLACES = 114
+
+IRIS_SPECIES = ["setosa", "versicolor", "virginica"]
+
+
+def air_quality(n_rows, seed=0):
+    """Rows shaped like basic_streamlit_app/data/Air_Quality.csv."""
+    rng = np.random.default_rng(seed)
+    indicator = rng.integers(len(AIR_QUALITY_INDICATORS), size=n_rows)
+    period = rng.integers(len(AIR_QUALITY_PERIODS), size=n_rows)
+    place = rng.integers(AIR_QUALITY_PLACES, size=n_rows)
+
+    names, infos, ids, medians = (np.array(col) for col in zip(*AIR_QUALITY_INDICATORS))
+    periods, start_dates = (np.array(col) for col in zip(*AIR_QUALITY_PERIODS))
+    place_names = np.array([f"Neighborhood {i:03d}" for i in range(AIR_QUALITY_PLACES)])
+    return pd.DataFrame({
+        "Unique ID": np.arange(100_000, 100_000 + n_rows),
+        "Indicator ID": ids[indicator].astype(np.int64),
+        "Name": names[indicator],
+        "Measure": "Mean",
+        "Measure Info": infos[indicator],
+        "Geo Type Name": np.array(AIR_QUALITY_GEO_TYPES)[place % len(AIR_QUALITY_GEO_TYPES)],
+        "Geo Join ID": 100 + place,
+        "Geo Place Name": place_names[place],
+        "Time Period": periods[period],
+        "Start_Date": start_dates[period],
+        "Data Value": np.round(medians[indicator].astype(float) * rng.lognormal(0, 0.35, n_rows), 1),
+    })
+
+
+def iris_like(n_rows, seed=0):
+    """Iris-schema rows (four measurements and a species name) drawn from per-species Gaussians fitted to Iris."""
+    from sklearn.datasets import load_iris
+
+    iris = load_iris()
+    rng = np.random.default_rng(seed)
+    species = rng.integers(len(IRIS_SPECIES), size=n_rows)
+    values = np.empty((n_rows, iris.data.shape[1]))
+    for label in range(len(IRIS_SPECIES)):
+        rows = species == label
+        sample = iris.data[iris.target == label]
+        values[rows] = rng.multivariate_normal(sample.mean(axis=0), np.cov(sample, rowvar=False), size=int(rows.sum()))
+    df = pd.DataFrame(np.round(np.clip(values, 0.1, None), 1), columns=iris.feature_names)
+    df["species"] = np.array(IRIS_SPECIES)[species]
+    return df
+
+
+def supervised(n_rows, seed=0):
+    """An upload for the supervised app: Iris features plus a text target to be encoded on ingestion."""
+    return iris_like(n_rows, seed)
+
+
+def unsupervised(n_rows, seed=0):
+    """The unsupervised app's sample schema: the four Iris measurements."""
+    return iris_like(n_rows, seed).drop(columns="species")
@@ -0,0 +1,5 @@
+"""Modules used by more than one of the Streamlit apps.
+
+Every app keeps its own folder; its entry script adds the repository root to sys.path so
+these are imported as ``shared.<module>``.
+"""
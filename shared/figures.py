@@ -0,0 +1,41 @@
+import io
+import threading
+from collections import OrderedDict
+
+# matplotlib is imported when a figure is rendered, so the apps' first render doesn't pay for it
+
+
+def render_png(fig):
+    """Render a figure the way st.pyplot does, then free it."""
+    import matplotlib.pyplot as plt
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=200, bbox_inches="tight")
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+class FigureCache:
+    """LRU cache of rendered figures (PNG bytes) keyed on the input fingerprint and plot settings.
+
+    The rendered image is cached rather than the Figure object: re-rendering a cached Figure
+    would repeat the expensive savefig on every rerun, and one Figure can't safely be drawn
+    by several sessions at once.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_render(self, key, draw):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        png = render_png(draw())
+        with self._lock:
+            self._entries[key] = png
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return png
@@ -0,0 +1,259 @@
+"""Background jobs for model fitting, shared by every session on the server process.
+
+Training used to run on the script thread inside the Train button's branch, blocking the page
+until it finished. A JobExecutor runs it on a small thread pool instead: the script submits a
+job and returns, and a fragment polls the job's progress until it finishes, then reruns the
+app to show the results.
+
+Jobs are keyed by their content (data fingerprint plus settings). Submitting a key that is
+already queued or running, from any session, subscribes to that job instead of starting a
+second one, and finished jobs are kept for a while so a rerun can pick up their results.
+Cancellation is cooperative: a job stops at its next ``job.report()`` call once every
+session waiting on it has cancelled.
+
+Threads rather than processes, because jobs share the app's in-memory caches and its data
+without pickling them, and scikit-learn, NumPy and SciPy release the GIL in their heavy loops.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+# Seconds the script waits for a job before handing it to the polling fragment, so cache hits render in the same rerun
+SUBMIT_GRACE = 0.2
+# Seconds between progress polls while a job runs
+POLL_INTERVAL = 0.5
+
+
+class Cancelled(Exception):
+    """Raised inside a job by report() once the job has been cancelled."""
+
+
+class Job:
+    """One background computation: its status, streamed progress, and result."""
+
+    def __init__(self, key, description=""):
+        self.key = key
+        self.id = uuid.uuid4().hex[:8]
+        self.description = description
+        self.status = PENDING
+        self.progress = 0.0
+        self.message = ""
+        # Partial results streamed by the job (e.g. the elbow inertias fitted so far)
+        self.partial = {}
+        self.result = None
+        self.error = None
+        # Timed steps, in the profiling panel's stage format
+        self.steps = []
+        self.submitted_at = time.time()
+        self.finished_at = None
+        self._subscribers = set()
+        self._cancel = threading.Event()
+        self._finished = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def done(self):
+        return self._finished.is_set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def wait(self, timeout=None):
+        """Block until the job finishes or `timeout` seconds pass; return whether it finished."""
+        return self._finished.wait(timeout)
+
+    def report(self, progress=None, message=None, **partial):
+        """Publish progress from inside the job, and stop it here if it has been cancelled.
+
+        Progress only moves forward, so steps that overlap (a fit that also fills in part of the
+        elbow sweep) never make the bar jump back.
+        """
+        with self._lock:
+            if progress is not None:
+                self.progress = min(max(float(progress), self.progress), 1.0)
+            if message is not None:
+                self.message = message
+            self.partial.update(partial)
+        if self._cancel.is_set():
+            raise Cancelled
+
+    def step(self, name):
+        """Context manager timing one step of the job for the profiling panel."""
+        return _Step(self, name)
+
+    def subscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.add(subscriber)
+
+    def cancel(self, subscriber=None):
+        """Withdraw `subscriber`; the job is cancelled once no session is waiting on it any more."""
+        with self._lock:
+            self._subscribers.discard(subscriber)
+            if subscriber is None or not self._subscribers:
+                self._cancel.set()
+
+    def _finish(self, status, result=None, error=None):
+        self.status = status
+        self.result = result
+        self.error = error
+        self.finished_at = time.time()
+        self._finished.set()
+
+
+class _Step:
+    def __init__(self, job, name):
+        self.job = job
+        self.name = name
+
+    def __enter__(self):
+        self._cpu_start = time.process_time()
+        self._wall_start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.job.steps.append({
+            "stage": f"{self.name} (background)",
+            "wall_s": time.perf_counter() - self._wall_start,
+            "cpu_s": time.process_time() - self._cpu_start,
+            "peak_rss_mb": None,
+            "rss_delta_mb": None,
+            "error": exc_type.__name__ if exc_type is not None else None,
+        })
+        return False
+
+
+class JobExecutor:
+    """Thread pool running jobs, deduplicated by key across sessions."""
+
+    def __init__(self, max_workers=2, keep_finished=32):
+        self.keep_finished = keep_finished
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.deduplicated = 0
+
+    def submit(self, key, fn, description="", subscriber=None):
+        """Run `fn(job)` in the background under `key`, or join the job already queued, running or done for it.
+
+        A failed or cancelled job is replaced by a fresh one.
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.status not in (FAILED, CANCELLED) and not job.cancelled:
+                self._jobs.move_to_end(key)
+                job.subscribe(subscriber)
+                self.deduplicated += 1
+                return job
+            job = Job(key, description)
+            job.subscribe(subscriber)
+            self._jobs[key] = job
+            self.submitted += 1
+            self._trim()
+        self._pool.submit(self._run, job, fn)
+        return job
+
+    def get(self, key):
+        with self._lock:
+            return self._jobs.get(key)
+
+    def _run(self, job, fn):
+        if job.cancelled:
+            job._finish(CANCELLED)
+            return
+        job.status = RUNNING
+        try:
+            result = fn(job)
+        except Cancelled:
+            job._finish(CANCELLED)
+        except Exception as e:
+            job._finish(FAILED, error=e)
+        else:
+            job.progress = 1.0
+            job._finish(DONE, result=result)
+        with self._lock:
+            self._trim()
+
+    def _trim(self):
+        # Unfinished jobs are never dropped; finished ones beyond keep_finished are, oldest first
+        finished = [key for key, job in self._jobs.items() if job.done]
+        for key in finished[:max(len(finished) - self.keep_finished, 0)]:
+            del self._jobs[key]
+
+
+def session_id():
+    """A stable id for this browser session, used to subscribe it to jobs."""
+    if "_job_session" not in st.session_state:
+        st.session_state["_job_session"] = uuid.uuid4().hex
+    return st.session_state["_job_session"]
+
+
+def background_job(executor, slot, config, submit=None, render_partial=None, profiler=None):
+    """This session's finished job for `config`, running it in the background if needed.
+
+    `submit` is a (key, fn, description) tuple when the job should be (re)started on this
+    rerun, e.g. because the Train button was clicked. The session remembers its job under
+    `slot` together with the `config` it was started for, so later reruns with the same
+    settings keep showing it and changing a setting hides it. While the job runs, a fragment
+    shows its progress (and `render_partial(job.partial)`) with a Cancel button, and None is
+    returned; once it is done the job itself is returned and its steps are added to
+    `profiler`, the first time this session sees it.
+    """
+    subscriber = session_id()
+    if submit is not None:
+        key, fn, description = submit
+        job = executor.submit(key, fn, description, subscriber=subscriber)
+        st.session_state[slot] = (config, job.key)
+
+    tracked = st.session_state.get(slot)
+    if tracked is None or tracked[0] != config:
+        return None
+    job = executor.get(tracked[1])
+    if job is None:
+        return None
+
+    if not job.wait(SUBMIT_GRACE if submit is not None else 0):
+        _watch(job, slot, subscriber, render_partial)
+        return None
+
+    if profiler is not None:
+        seen = st.session_state.setdefault("_jobs_profiled", set())
+        if job.id not in seen:
+            seen.add(job.id)
+            profiler.add_stages(job.steps)
+
+    if job.status == FAILED:
+        st.error(f"❗ {job.description or 'Training'} failed: {job.error}")
+        return None
+    if job.status == CANCELLED:
+        st.info(f"{job.description or 'Training'} was cancelled.")
+        return None
+    return job
+
+
+def _watch(job, slot, subscriber, render_partial):
+    @st.fragment(run_every=POLL_INTERVAL)
+    def poll():
+        if job.done:
+            # A full rerun renders the results
+            st.rerun()
+        st.progress(job.progress, text=job.message or job.description or "Working...")
+        if render_partial is not None:
+            render_partial(dict(job.partial))
+        if st.button("Cancel ✋", key=f"_cancel_{slot}"):
+            job.cancel(subscriber)
+            st.session_state.pop(slot, None)
+            st.rerun()
+
+    poll()
@@ -0,0 +1,211 @@
+"""Per-rerun stage profiling for the Streamlit apps.
+
+Every stage of a rerun (loading, encoding, fitting, plotting, ...) is wrapped in
+``profiler.stage("name")``, usable as a context manager or a decorator, which records its
+wall time, CPU time and peak resident memory. Reruns are kept per session for the optional
+sidebar panel and can be downloaded as JSONL; setting STREAMLIT_PROFILE_LOG to a path also
+appends every rerun from every session to that file.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import ContextDecorator
+from datetime import datetime, timezone
+
+import pandas as pd
+import streamlit as st
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Reruns kept per session for the panel and the JSONL download
+HISTORY_LENGTH = 50
+# Seconds between RSS samples while a stage runs
+SAMPLE_INTERVAL = 0.005
+LOG_ENV_VAR = "STREAMLIT_PROFILE_LOG"
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_log_lock = threading.Lock()
+
+
+def max_rss():
+    """High-water mark of this process's resident memory in bytes (0 where unavailable)."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+def current_rss():
+    """Resident memory of this process in bytes, falling back to the high-water mark without /proc."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        return max_rss()
+
+
+class PeakRSS:
+    """Context manager tracking this process's peak resident memory while its block runs.
+
+    The process high-water mark can't be reset per block, so a sampler thread polls the
+    current RSS instead. Unlike tracemalloc this sees memory allocated outside the Python
+    heap (NumPy buffers, parsers), costs next to nothing, and doesn't touch global state that
+    other threads depend on.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.start = self.peak = self.end = 0
+
+    def __enter__(self):
+        self.peak = self.start = current_rss()
+        self._done = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._sampler.start()
+        return self
+
+    def _sample(self):
+        while not self._done.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+    def __exit__(self, exc_type, exc, tb):
+        self._done.set()
+        self._sampler.join()
+        self.end = current_rss()
+        self.peak = max(self.peak, self.end)
+        return False
+
+
+class _Stage(ContextDecorator):
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self._rss = PeakRSS().__enter__()
+        self._cpu_start = time.process_time()
+        self._wall_start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self._wall_start
+        cpu = time.process_time() - self._cpu_start
+        self._rss.__exit__(exc_type, exc, tb)
+        self.profiler._record({
+            "stage": self.name,
+            "wall_s": wall,
+            "cpu_s": cpu,
+            "peak_rss_mb": self._rss.peak / 2**20,
+            "rss_delta_mb": (self._rss.end - self._rss.start) / 2**20,
+            "error": exc_type.__name__ if exc_type is not None else None,
+        })
+        return False
+
+
+class Profiler:
+    """Stage timings for one session's reruns.
+
+    CPU time is process-wide (it includes scikit-learn's worker threads, and anything other
+    sessions run at the same time), so compare it with wall time rather than across sessions.
+    """
+
+    def __init__(self, app, history=HISTORY_LENGTH, log_path=None):
+        self.app = app
+        self.session = uuid.uuid4().hex[:8]
+        self.history = deque(maxlen=history)
+        self.log_path = log_path if log_path is not None else os.environ.get(LOG_ENV_VAR)
+        self._reruns = 0
+        self._current = None
+
+    def start_rerun(self):
+        # A rerun ended by st.stop() never reaches finish_rerun, so close it here instead
+        if self._current is not None:
+            self.finish_rerun(stopped=True)
+        self._reruns += 1
+        self._current = {
+            "app": self.app,
+            "session": self.session,
+            "rerun": self._reruns,
+            "started_at": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "stages": [],
+            "_wall_start": time.perf_counter(),
+            "_last_exit": time.perf_counter(),
+        }
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+    def _record(self, stage):
+        if self._current is not None:
+            self._current["stages"].append(stage)
+            self._current["_last_exit"] = time.perf_counter()
+
+    def add_stages(self, stages):
+        """Add stages measured elsewhere (e.g. by a background job) to the current rerun."""
+        for stage in stages:
+            self._record(dict(stage))
+
+    def finish_rerun(self, stopped=False):
+        """Close the current rerun, add it to the history and the log file, and return it."""
+        current, self._current = self._current, None
+        if current is None:
+            return None
+        wall_start = current.pop("_wall_start")
+        # A stopped rerun's true end isn't known; its last instrumented stage is the best estimate
+        end = current.pop("_last_exit") if stopped else time.perf_counter()
+        current["wall_s"] = end - wall_start
+        current["peak_rss_mb"] = max_rss() / 2**20
+        current["stopped"] = stopped
+        self.history.append(current)
+        if self.log_path:
+            self._append_log(current)
+        return current
+
+    def _append_log(self, rerun):
+        try:
+            with _log_lock, open(self.log_path, "a") as log:
+                log.write(json.dumps(rerun) + "\n")
+        except OSError:
+            pass
+
+    def stages_frame(self, rerun=None):
+        rerun = rerun if rerun is not None else (self.history[-1] if self.history else None)
+        columns = ["stage", "wall_s", "cpu_s", "peak_rss_mb", "rss_delta_mb", "error"]
+        return pd.DataFrame(rerun["stages"] if rerun else [], columns=columns)
+
+    def to_jsonl(self):
+        return "".join(json.dumps(rerun) + "\n" for rerun in self.history)
+
+
+def session_profiler(app):
+    """This session's profiler, with a new rerun started on it."""
+    if "_profiler" not in st.session_state:
+        st.session_state["_profiler"] = Profiler(app)
+    profiler = st.session_state["_profiler"]
+    profiler.start_rerun()
+    return profiler
+
+
+def render_panel(container, profiler):
+    """Finish the rerun and, if the panel is switched on, show its stages and the history in `container`."""
+    rerun = profiler.finish_rerun()
+    if not container.checkbox("Show profiling panel ⏱️", key="_profiling_panel"):
+        return
+    container.caption(f"Rerun {rerun['rerun']}: {rerun['wall_s']:.3f}s wall, process peak RSS {rerun['peak_rss_mb']:.0f} MB")
+    container.dataframe(profiler.stages_frame(rerun).round(3), hide_index=True)
+    totals = pd.DataFrame(
+        [{"stage": s["stage"], "wall_s": s["wall_s"]} for r in profiler.history for s in r["stages"]],
+        columns=["stage", "wall_s"],
+    )
+    container.caption(f"Median wall time per stage over the last {len(profiler.history)} reruns")
+    container.dataframe(totals.groupby("stage")["wall_s"].median().sort_values(ascending=False), height=150)
+    container.download_button(
+        "Download profile (JSONL)", profiler.to_jsonl(), file_name=f"{profiler.app}-profile.jsonl", mime="application/jsonl"
+    )
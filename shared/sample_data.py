@@ -0,0 +1,33 @@
+"""The Iris sample dataset, loaded without importing scikit-learn.
+
+scikit-learn ships Iris as a small CSV inside its package. Importing sklearn itself takes well
+over a second, which the first render of the app otherwise doesn't need, so the CSV is read
+directly and load_iris is only used as a fallback if the file isn't where it's expected.
+"""
+import importlib.util
+import os
+
+import pandas as pd
+
+IRIS_FEATURES = ["sepal length (cm)", "sepal width (cm)", "petal length (cm)", "petal width (cm)"]
+
+
+def _iris_csv():
+    # find_spec locates the package without running its __init__
+    spec = importlib.util.find_spec("sklearn")
+    if spec is None or not spec.submodule_search_locations:
+        return None
+    return os.path.join(spec.submodule_search_locations[0], "datasets", "data", "iris.csv")
+
+
+def load_iris_frame():
+    """Iris as load_iris(as_frame=True).frame: the four measurements plus an integer target."""
+    path = _iris_csv()
+    if path is not None and os.path.exists(path):
+        # The first line holds the row count and class names rather than column headers
+        frame = pd.read_csv(path, skiprows=1, header=None, names=IRIS_FEATURES + ["target"])
+        if frame.shape == (150, 5):
+            return frame.astype({"target": "int64"})
+
+    from sklearn.datasets import load_iris
+    return load_iris(as_frame=True).frame